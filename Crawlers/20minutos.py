@@ -1,23 +1,23 @@
 # -*- coding: utf-8 -*-
 import scrapy
-import json
-import random
 import os
-from bs4 import BeautifulSoup
 from datetime import datetime
+from extraccion import texto, primero, atributo, parrafos, recortar, modo_extraccion, COMPLETO
+from ajustes import ajustes
+from metricas import rechazo, mostrar_articulos
 
 class VeinteMinutosSpider(scrapy.Spider):
     name = '20minutos'
     allowed_domains = ['20minutos.es']
     start_urls = ['https://www.20minutos.es/']
+    extraccion = (COMPLETO, None)  # Todos los párrafos (EXTRACCION_MODO lo cambia)
 
-    custom_settings = {
-        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'LOG_LEVEL': 'WARNING',
-        'ROBOTSTXT_OBEY': False,
-        'DOWNLOAD_DELAY': 2,
-        'CONCURRENT_REQUESTS': 1
-    }
+    # Ajustes comunes (pipelines, rastreo incremental, AutoThrottle) en ajustes.py
+    custom_settings = ajustes(
+        LOG_LEVEL='WARNING',
+        ROBOTSTXT_OBEY=False,
+        NOTICIAS_DIR='20minutos'
+    )
 
     def parse(self, response):
         # Extraer artículos principales
@@ -30,34 +30,31 @@ class VeinteMinutosSpider(scrapy.Spider):
             yield response.follow(next_page, self.parse)
 
     def parse_article(self, response):
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extracción de datos
-        title = soup.find('h1', {'class': 'article-title'})
-        title = title.text.strip() if title else None
+        # Extracción de datos (sobre el árbol que Scrapy ya ha parseado)
+        title = primero(response, 'h1.article-title')
+        title = texto(title, separador='', limpiar=False).strip() if title is not None else None
         
-        date = soup.find('time', {'itemprop': 'datePublished'})
-        date = date['datetime'][:10] if date else None
+        date = atributo(primero(response, 'time[itemprop="datePublished"]'), 'datetime')
+        date = date[:10] if date else None
         
-        content = []
-        body = soup.find('div', {'class': 'article-text'})
-        if body:
-            for p in body.find_all('p', class_='paragraph'):
-                content.append(p.get_text().strip())
-        content = ' '.join(content)
+        content = ''
+        body = primero(response, 'div.article-text')
+        if body is not None:
+            # Los párrafos se extraen de uno en uno hasta agotar el presupuesto
+            content = recortar(parrafos(body.css('p.paragraph'), limpiar=False), *modo_extraccion(self))
         
         section = response.url.split('/')[3] if len(response.url.split('/')) > 4 else 'general'
         section = section.lower().replace('-', '_')[:25]
 
-        # Validación y logging
+        # Validación y logging (solo con MOSTRAR_ARTICULOS)
         if title and content and len(content) > 100:
-            self.logger.warning("\n" + "-"*50)
-            self.logger.warning(f"URL: {response.url}")
-            self.logger.warning(f"Título: {title}")
-            self.logger.warning(f"Sección: {section}")
-            self.logger.warning("-"*50 + "\n")
+            if mostrar_articulos(self):
+                self.logger.warning("\n" + "-"*50)
+                self.logger.warning(f"URL: {response.url}")
+                self.logger.warning(f"Título: {title}")
+                self.logger.warning(f"Sección: {section}")
+                self.logger.warning("-"*50 + "\n")
             
-            self.save_article(response.url, title, date, section, content)
             yield {
                 'url': response.url,
                 'title': title,
@@ -65,22 +62,8 @@ class VeinteMinutosSpider(scrapy.Spider):
                 'section': section,
                 'content': content
             }
-
-    def save_article(self, url, title, date, section, content):
-        base_dir = '20minutos'
-        section_dir = os.path.join(base_dir, section)
-        os.makedirs(section_dir, exist_ok=True)
-        
-        filename = os.path.join(section_dir, f"{random.getrandbits(64)}.json")
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump({
-                'url': url,
-                'title': title,
-                'date': date,
-                'section': section,
-                'content': content
-            }, f, indent=2, ensure_ascii=False)
+        else:
+            rechazo(self, 'articulo_invalido')
 
 # Bloque de ejecución directa
 if __name__ == "__main__":
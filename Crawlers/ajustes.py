@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+# Ajustes comunes a todos los spiders.
+#
+# Antes cada spider fijaba CONCURRENT_REQUESTS = 1 o 2 y DOWNLOAD_DELAY de 1.5-2 s,
+# con lo que un rastreo completo iba a una página cada ~2 s por periódico. Ahora
+# la velocidad la decide AutoThrottle por dominio a partir de la latencia real:
+# si el servidor responde rápido baja el retardo y se solapan más peticiones,
+# si se satura (o devuelve errores) el retardo sube solo.
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# Perfil inicial de cada dominio (la clave es el host de las peticiones).
+# AutoThrottle parte de este retardo y lo ajusta; 'concurrency' es el techo por dominio.
+PERFILES = {
+    'www.20minutos.es':    {'concurrency': 4, 'delay': 1.0},
+    'www.clarin.com':      {'concurrency': 4, 'delay': 1.0},
+    'elpais.com':          {'concurrency': 8, 'delay': 0.5},
+    'www.elmundo.es':      {'concurrency': 8, 'delay': 0.5},
+    'www.lanacion.com.ar': {'concurrency': 4, 'delay': 1.0},
+}
+
+AJUSTES_COMUNES = {
+    'USER_AGENT': USER_AGENT,
+    'FEED_EXPORT_ENCODING': 'utf-8',
+
+    # Guardado de artículos y rastreo incremental
+    'ITEM_PIPELINES': {'duplicados.NearDuplicatePipeline': 200, 'pipelines.JsonlShardPipeline': 300},
+    # archivo.py solo se activa con ARCHIVO_MODO = 'grabar' o 'reproducir'
+    'DOWNLOADER_MIDDLEWARES': {'archivo.ArchivoMiddleware': 40, 'vistos.IncrementalMiddleware': 50},
+
+    # Métricas (metricas.py): páginas/s, artículos/s, bytes, tiempo de parse y rechazos
+    'EXTENSIONS': {'metricas.MetricasExtension': 500},
+    'SPIDER_MIDDLEWARES': {'metricas.TiempoParseMiddleware': 950},  # lo más cerca posible del spider
+    'METRICAS_INTERVALO': 30,
+    # MOSTRAR_ARTICULOS = True para ver cada artículo por consola (más lento; por defecto no)
+
+    # Cuánto cuerpo se guarda (extraccion.py): EXTRACCION_MODO = 'parrafos' o 'tokens' con
+    # EXTRACCION_LIMITE, o 'completo'. No se fija aquí para que se pueda pasar con -s o desde
+    # el lanzador; sin fijar, cada spider usa lo de siempre (su atributo extraccion).
+
+    # Concurrencia adaptativa por dominio
+    'AUTOTHROTTLE_ENABLED': True,
+    'AUTOTHROTTLE_START_DELAY': 1.0,
+    'AUTOTHROTTLE_MAX_DELAY': 10.0,
+    'AUTOTHROTTLE_TARGET_CONCURRENCY': 4.0,  # peticiones en vuelo que se buscan por dominio
+    'DOWNLOAD_DELAY': 0.1,                   # suelo: AutoThrottle nunca baja de aquí
+    'DOWNLOAD_SLOTS': PERFILES,
+    'CONCURRENT_REQUESTS': 64,               # total entre todos los dominios
+    'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
+    'DNSCACHE_ENABLED': True,
+    'REACTOR_THREADPOOL_MAXSIZE': 20,
+}
+
+
+def ajustes(**propios):
+    """custom_settings de un spider: los comunes más los suyos (los suyos mandan)"""
+    return {**AJUSTES_COMUNES, **propios}
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+# Grabación y reproducción de rastreos sin red.
+#
+# Con ARCHIVO_MODO = 'grabar', ArchivoMiddleware guarda cada respuesta descargada
+# en <ARCHIVO_DIR>/<spider>.arc.gz, un archivo al estilo WARC pero más simple:
+# por cada respuesta una cabecera JSON en una línea (url, estado, cabeceras,
+# callback y meta de la petición, longitud) seguida del cuerpo en bruto, cada
+# registro en su propio miembro gzip para poder seguir añadiendo al final.
+#
+# Con ARCHIVO_MODO = 'reproducir' las peticiones se responden desde el archivo y
+# nunca salen a la red (las URLs que no estén se ignoran).
+#
+# Además, este módulo se puede ejecutar para pasar el parse de un spider sobre
+# un archivo a toda velocidad, sin reactor ni planificador, y medir páginas/s o
+# guardar los items para comparar extracciones entre versiones de los selectores:
+#
+#   python archivo.py elpais grabaciones/elpais.arc.gz [--salida items.jsonl] [--repeticiones 3]
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+from scrapy import Request, signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+from scrapy.http import Headers
+from scrapy.responsetypes import responsetypes
+
+# Tipos de meta que se guardan con cada respuesta (lo demás es interno de Scrapy)
+META_SIMPLE = (str, int, float, bool)
+
+
+def leer_archivo(path):
+    """Itera los registros (cabecera, cuerpo) de un archivo .arc.gz"""
+    with gzip.open(path, 'rb') as f:
+        while True:
+            linea = f.readline()
+            if not linea:
+                return
+            cabecera = json.loads(linea)
+            cuerpo = f.read(cabecera['longitud'])
+            f.read(1)  # salto de línea tras el cuerpo
+            yield cabecera, cuerpo
+
+
+def construir_respuesta(cabecera, cuerpo, request=None):
+    headers = Headers(cabecera['cabeceras'])
+    if request is None:
+        request = Request(cabecera['url_peticion'], meta=cabecera['meta'], dont_filter=True)
+    cls = responsetypes.from_args(headers=headers, url=cabecera['url'], body=cuerpo)
+    return cls(url=cabecera['url'], status=cabecera['estado'], headers=headers, body=cuerpo, request=request)
+
+
+class ArchivoMiddleware:
+    """Downloader middleware que graba las respuestas o las sirve desde el archivo"""
+
+    def __init__(self, modo, path):
+        self.modo = modo
+        self.path = path
+        self.registros = {}
+        if modo == 'reproducir':
+            # Se carga entero en memoria: son unos pocos miles de páginas por periódico
+            for cabecera, cuerpo in leer_archivo(path):
+                self.registros[cabecera['url_peticion']] = (cabecera, cuerpo)
+        else:
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.fichero = open(path, 'ab')
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        modo = crawler.settings.get('ARCHIVO_MODO')
+        if modo not in ('grabar', 'reproducir'):
+            raise NotConfigured
+        directorio = crawler.settings.get('ARCHIVO_DIR', 'grabaciones')
+        mw = cls(modo, os.path.join(directorio, f'{crawler.spidercls.name}.arc.gz'))
+        # Los downloader middlewares no reciben close_spider: el fichero se cierra con la señal
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def process_request(self, request, spider):
+        if self.modo != 'reproducir':
+            return None
+        if request.url not in self.registros:
+            raise IgnoreRequest(f"No está en el archivo: {request.url}")
+        cabecera, cuerpo = self.registros[request.url]
+        return construir_respuesta(cabecera, cuerpo, request)
+
+    def process_response(self, request, response, spider):
+        if self.modo == 'grabar':
+            callback = request.callback.__name__ if callable(request.callback) else 'parse'
+            cabecera = {
+                'url_peticion': request.url,
+                'url': response.url,
+                'estado': response.status,
+                'cabeceras': [[k.decode('latin-1'), v.decode('latin-1')]
+                              for k, vs in response.headers.items() for v in vs],
+                'callback': callback,
+                'meta': {k: v for k, v in request.meta.items() if isinstance(v, META_SIMPLE) and not k.startswith('_')},
+                'longitud': len(response.body),
+            }
+            registro = json.dumps(cabecera, ensure_ascii=False).encode('utf-8') + b'\n' + response.body + b'\n'
+            self.fichero.write(gzip.compress(registro, compresslevel=5))
+        return response
+
+    def spider_closed(self, spider):
+        if self.modo == 'grabar':
+            self.fichero.close()
+
+
+def medir_parse(spidercls, path, repeticiones=1, salida=None):
+    """Pasa el parse del spider por todas las respuestas del archivo y devuelve las cifras"""
+    from scrapy.utils.test import get_crawler
+
+    registros = list(leer_archivo(path))
+    crawler = get_crawler(spidercls, {'LOG_LEVEL': 'ERROR'})
+    spider = spidercls.from_crawler(crawler)
+    crawler.spider = spider
+
+    fichero = open(salida, 'w', encoding='utf-8') if salida else None
+    items = peticiones = 0
+    t0 = time.perf_counter()
+    for vuelta in range(repeticiones):
+        for cabecera, cuerpo in registros:
+            response = construir_respuesta(cabecera, cuerpo)
+            for resultado in getattr(spider, cabecera['callback'])(response) or ():
+                if isinstance(resultado, Request):
+                    peticiones += 1
+                else:
+                    items += 1
+                    if fichero and vuelta == 0:
+                        fichero.write(json.dumps(dict(resultado), ensure_ascii=False) + '\n')
+    dt = time.perf_counter() - t0
+    if fichero:
+        fichero.close()
+
+    paginas = len(registros) * repeticiones
+    return {'paginas': paginas, 'items': items, 'peticiones': peticiones, 'segundos': dt,
+            'paginas_por_segundo': paginas / dt if dt else 0.0}
+
+
+if __name__ == '__main__':
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from lanzador import SPIDERS, cargar_spider
+
+    parser = argparse.ArgumentParser(description='Ejecuta el parse de un spider sobre un archivo grabado')
+    parser.add_argument('spider', choices=sorted(SPIDERS))
+    parser.add_argument('archivo', help='Fichero .arc.gz grabado con ARCHIVO_MODO=grabar')
+    parser.add_argument('--repeticiones', type=int, default=1)
+    parser.add_argument('--salida', help='JSONL donde guardar los items extraídos (primera vuelta)')
+    args = parser.parse_args()
+
+    r = medir_parse(cargar_spider(args.spider), args.archivo, args.repeticiones, args.salida)
+    print(f"{r['paginas']} páginas en {r['segundos']:.2f} s ({r['paginas_por_segundo']:.1f} páginas/s), "
+          f"{r['items']} items, {r['peticiones']} peticiones")
@@ -0,0 +1,133 @@
+# -*- coding: utf-8 -*-
+# Detección de artículos casi duplicados durante el rastreo.
+#
+# El mismo artículo llega a veces por dos URLs distintas (parámetros de
+# seguimiento, alias de sección en Clarín/La Nación...). Antes se guardaba dos
+# veces y acababa repetido en el CSV y repartido entre train y test.
+#
+# Cada contenido se resume en un SimHash de 64 bits sobre trigramas de palabras.
+# Dos textos casi iguales tienen huellas a poca distancia de Hamming; partiendo
+# la huella en (distancia + 1) bandas, dos huellas a distancia <= distancia
+# coinciden seguro en alguna banda, así que basta mirar un diccionario por banda
+# (O(1) por artículo) en lugar de comparar contra todo lo guardado.
+import hashlib
+import re
+
+from scrapy.exceptions import DropItem
+
+from pipelines import clave_url
+from vistos import abrir_indice, cerrar_indice
+
+PALABRA = re.compile(r'\w+', re.UNICODE)
+BITS = 64
+
+
+def simhash(texto, n=3):
+    """SimHash de 64 bits del texto usando n-gramas de palabras"""
+    palabras = PALABRA.findall(texto.lower())
+    if len(palabras) < n:
+        rasgos = [' '.join(palabras)]
+    else:
+        rasgos = [' '.join(palabras[i:i + n]) for i in range(len(palabras) - n + 1)]
+
+    pesos = [0] * BITS
+    for rasgo in rasgos:
+        h = int.from_bytes(hashlib.blake2b(rasgo.encode('utf-8'), digest_size=8).digest(), 'big')
+        for bit in range(BITS):
+            pesos[bit] += 1 if (h >> bit) & 1 else -1
+
+    return sum(1 << bit for bit in range(BITS) if pesos[bit] > 0)
+
+
+def distancia(a, b):
+    return bin(a ^ b).count('1')
+
+
+class IndiceSimHash:
+    """Índice por bandas de huellas SimHash, persistido en SQLite"""
+
+    def __init__(self, path, max_distancia=3):
+        self.max_distancia = max_distancia
+        self.n_bandas = max_distancia + 1
+        self.ancho = BITS // self.n_bandas
+        self.mascara = (1 << self.ancho) - 1
+        self.bandas = [dict() for _ in range(self.n_bandas)]
+        self.pendientes = 0
+
+        self.path = path
+        self.conn = abrir_indice(path)
+        self.conn.execute('CREATE TABLE IF NOT EXISTS huellas (clave TEXT PRIMARY KEY, huella TEXT)')
+        # Las huellas de ejecuciones anteriores se cargan en memoria una vez
+        for clave, huella in self.conn.execute('SELECT clave, huella FROM huellas'):
+            self._indexar(clave, int(huella, 16))
+
+    def _trozos(self, huella):
+        return [(huella >> (i * self.ancho)) & self.mascara for i in range(self.n_bandas)]
+
+    def _indexar(self, clave, huella):
+        for banda, trozo in zip(self.bandas, self._trozos(huella)):
+            banda.setdefault(trozo, []).append((clave, huella))
+
+    def buscar(self, huella):
+        """Clave de un artículo ya indexado a distancia <= max_distancia, o None"""
+        for banda, trozo in zip(self.bandas, self._trozos(huella)):
+            for clave, otra in banda.get(trozo, ()):
+                if distancia(huella, otra) <= self.max_distancia:
+                    return clave
+        return None
+
+    def agregar(self, clave, huella):
+        self._indexar(clave, huella)
+        # Hex en texto: SQLite solo guarda enteros de 64 bits con signo
+        self.conn.execute('INSERT OR IGNORE INTO huellas VALUES (?, ?)', (clave, f'{huella:016x}'))
+        self.pendientes += 1
+        if self.pendientes >= 200:
+            self.conn.commit()
+            self.pendientes = 0
+
+    def cerrar(self):
+        cerrar_indice(self.path)
+
+
+class NearDuplicatePipeline:
+    """Descarta (o enlaza con 'duplicado_de') los artículos casi iguales a otro ya guardado"""
+
+    def __init__(self, path, max_distancia, modo, stats):
+        self.path = path
+        self.max_distancia = max_distancia
+        self.modo = modo
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            path=settings.get('NOTICIAS_INDICE', 'vistos.sqlite3'),
+            max_distancia=settings.getint('NOTICIAS_DUP_DISTANCIA', 3),
+            modo=settings.get('NOTICIAS_DUPLICADOS', 'descartar'),  # 'descartar' o 'enlazar'
+            stats=crawler.stats,
+        )
+
+    def open_spider(self, spider):
+        self.indice = IndiceSimHash(self.path, self.max_distancia)
+
+    def close_spider(self, spider):
+        self.indice.cerrar()
+
+    def process_item(self, item, spider):
+        clave = item.get('id') or clave_url(item['url'])
+        huella = simhash(item['content'])
+        original = self.indice.buscar(huella)
+
+        if original is None:
+            self.indice.agregar(clave, huella)
+            return item
+
+        if original == clave:  # la misma URL otra vez
+            raise DropItem(f"Artículo repetido: {item['url']}")
+
+        self.stats.inc_value('duplicados/casi_iguales', spider=spider)
+        if self.modo == 'enlazar':
+            item['duplicado_de'] = original
+            return item
+        raise DropItem(f"Casi duplicado de {original}: {item['url']}")
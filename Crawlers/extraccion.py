@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Utilidades de extracción comunes a todos los spiders.
+# Trabajan directamente sobre los selectores de Scrapy (parsel/lxml), que ya
+# tienen el HTML parseado una única vez por respuesta, en lugar de volver a
+# construir un BeautifulSoup(response.text, 'html.parser') en cada artículo.
+import json
+from itertools import islice
+
+try:
+    import orjson  # opcional: bastante más rápido que json para los bloques grandes
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+
+def texto(selector, separador=' ', limpiar=True):
+    """Devuelve el texto de un nodo y sus descendientes (equivale a get_text de bs4)"""
+    if selector is None:
+        return ''
+    trozos = selector.xpath('.//text()').getall()
+    if limpiar:
+        trozos = [t.strip() for t in trozos]
+        return separador.join(t for t in trozos if t)
+    return separador.join(trozos)
+
+
+def primero(selector, *consultas):
+    """Devuelve el primer nodo que encaje con alguna de las consultas CSS, por orden"""
+    for consulta in consultas:
+        nodo = selector.css(consulta)
+        if nodo:
+            return nodo[0]
+    return None
+
+
+def atributo(nodo, nombre):
+    """Atributo de un nodo o None si el nodo o el atributo no existen"""
+    if nodo is None:
+        return None
+    return nodo.attrib.get(nombre)
+
+
+
+# Modos de extracción del cuerpo (EXTRACCION_MODO / EXTRACCION_LIMITE en los ajustes)
+PARRAFOS = 'parrafos'  # los primeros N párrafos
+TOKENS = 'tokens'      # las primeras N palabras
+COMPLETO = 'completo'  # todo el cuerpo
+
+
+def parrafos(nodos, separador='', limpiar=True, filtro=None):
+    """Itera el texto de cada párrafo no vacío (y que pase el filtro), extrayéndolo solo cuando se pide"""
+    for nodo in nodos:
+        t = texto(nodo, separador, limpiar).strip()
+        if t and (filtro is None or filtro(t)):
+            yield t
+
+
+def _comprobar_limite(modo, limite):
+    """PARRAFOS y TOKENS sin un límite positivo fallan, en vez de guardar el cuerpo entero sin avisar"""
+    if modo in (PARRAFOS, TOKENS) and (limite is None or limite <= 0):
+        raise ValueError(f"El modo de extracción {modo} necesita un límite positivo (EXTRACCION_LIMITE), no {limite!r}")
+
+
+def recortar(textos, modo=COMPLETO, limite=None, separador=' '):
+    """Une los párrafos hasta agotar el presupuesto, sin extraer los que sobran.
+
+    Con modo TOKENS el último párrafo se corta en la palabra N.
+    """
+    if modo == COMPLETO:
+        return separador.join(textos)
+    _comprobar_limite(modo, limite)
+    if modo == PARRAFOS:
+        return separador.join(islice(textos, limite))
+    if modo == TOKENS:
+        trozos = []
+        quedan = limite
+        for t in textos:
+            palabras = t.split()
+            if len(palabras) >= quedan:
+                trozos.append(' '.join(palabras[:quedan]))
+                break
+            trozos.append(t)
+            quedan -= len(palabras)
+        return separador.join(trozos)
+    raise ValueError(f"Modo de extracción desconocido: {modo}")
+
+
+def modo_extraccion(spider):
+    """(modo, límite) del spider: EXTRACCION_MODO/EXTRACCION_LIMITE si están fijados, si no spider.extraccion"""
+    modo, limite = spider.extraccion
+    if spider.settings.get('EXTRACCION_MODO'):
+        modo = spider.settings.get('EXTRACCION_MODO')
+        limite = spider.settings.getint('EXTRACCION_LIMITE') or None
+    _comprobar_limite(modo, limite)
+    return modo, limite
+
+
+def es_news_article(data):
+    """True si el objeto JSON-LD es de tipo NewsArticle (o lo incluye en una lista de tipos)"""
+    tipo = data.get('@type', [])
+    return 'NewsArticle' in tipo if isinstance(tipo, list) else tipo == 'NewsArticle'
+
+
+def json_ld_noticia(response, es_noticia=es_news_article, al_fallar=None):
+    """Primer objeto NewsArticle de los bloques JSON-LD de la página, o None.
+
+    Los bloques que ni siquiera contienen el texto 'NewsArticle' (BreadcrumbList,
+    Organization, WebSite...) no se parsean, y se deja de buscar en cuanto aparece
+    la noticia. al_fallar(error) se llama con cada bloque candidato que no es JSON válido.
+    """
+    for bloque in response.xpath('//script[@type="application/ld+json"]/text()').getall():
+        if 'NewsArticle' not in bloque:
+            continue
+        try:
+            data = _loads(bloque)
+        except ValueError as e:  # json.JSONDecodeError y orjson.JSONDecodeError
+            if al_fallar is not None:
+                al_fallar(e)
+            continue
+        for item in data if isinstance(data, list) else [data]:
+            if isinstance(item, dict) and es_noticia(item):
+                return item
+    return None
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+# Clasificación de enlaces antes de programarlos.
+#
+# Los spiders que siguen "cualquier enlace del dominio" (El País, La Nación)
+# llenaban el planificador de URLs que se descargaban para nada: recursos,
+# páginas de autor, suscripciones... Cada sitio define aquí unas expresiones
+# regulares compiladas una vez que separan:
+#   - ARTICULO: URL con forma de noticia -> se pide con prioridad alta
+#   - PORTADA: portadas y secciones      -> se pide con prioridad baja (solo aportan enlaces)
+#   - None: se descarta sin descargarla
+# Los contadores frontera/* de las stats permiten ver cuántas descargas se ahorran.
+import re
+from urllib.parse import urlsplit
+
+ARTICULO = 'articulo'
+PORTADA = 'portada'
+
+# Prioridad de Scrapy (mayor = antes) según el tipo de enlace
+PRIORIDAD = {ARTICULO: 10, PORTADA: 0}
+
+RECURSOS = re.compile(r'\.(?:jpe?g|png|gif|webp|svg|ico|css|js|json|xml|rss|pdf|zip|mp3|mp4|m3u8)$', re.I)
+
+
+class Frontera:
+    """Clasificador de URLs de un sitio"""
+
+    def __init__(self, dominio, articulo, portada=None, descartar=None):
+        self.dominio = re.compile(dominio)
+        self.articulo = re.compile(articulo)
+        self.portada = re.compile(portada) if portada else None
+        self.descartar = re.compile(descartar) if descartar else None
+
+    def clasificar(self, url):
+        partes = urlsplit(url)
+        if partes.scheme not in ('http', 'https') or not self.dominio.search(partes.netloc):
+            return None
+        ruta = partes.path
+        if RECURSOS.search(ruta) or (self.descartar and self.descartar.search(ruta)):
+            return None
+        if self.articulo.search(ruta):
+            return ARTICULO
+        if self.portada is None or self.portada.search(ruta):
+            return PORTADA
+        return None
+
+    def enlaces(self, response, callback, stats=None):
+        """Requests para los enlaces útiles de la página, sin repetir ni descargar lo descartado"""
+        for href in dict.fromkeys(response.css('a::attr(href)').getall()):  # sin repetidos, en orden
+            try:
+                url = response.urljoin(href.strip())
+                tipo = self.clasificar(url)
+            except ValueError:  # enlaces mal formados
+                tipo = None
+            if stats is not None:
+                stats.inc_value(f'frontera/{tipo or "descartada"}')
+            if tipo is not None:
+                yield response.follow(url, callback, priority=PRIORIDAD[tipo], meta={'frontera': tipo})
+
+
+def contar_descarga(stats, response, con_articulo):
+    """Cuenta si una descarga programada como 'tipo' acabó dando un artículo"""
+    tipo = response.meta.get('frontera', 'inicio')
+    stats.inc_value(f'frontera/descargas/{tipo}')
+    if not con_articulo:
+        stats.inc_value(f'frontera/descargas_sin_articulo/{tipo}')
+
+
+SECCIONES_LANACION = r'/(?:politica|economia|sociedad|cultura|deportes)/'
+
+LANACION = Frontera(
+    dominio=r'(?:^|\.)lanacion\.com\.ar(?::\d+)?$',
+    articulo=SECCIONES_LANACION + r'.*-nid\d+',  # las noticias terminan en -nid<fecha/id>
+    portada=SECCIONES_LANACION,
+    descartar=r'/autor/',
+)
+
+ELPAIS = Frontera(
+    dominio=r'(?:^|\.)elpais\.com(?::\d+)?$',
+    articulo=r'/\d{4}-\d{2}-\d{2}/[^/]+\.html$',  # /<seccion>/AAAA-MM-DD/<titular>.html
+    descartar=r'/autor/|/suscripciones/|/newsletters/',
+)
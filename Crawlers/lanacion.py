@@ -1,59 +1,49 @@
 # -*- coding: utf-8 -*-
 import scrapy
-import json
-import random
-import os
-from bs4 import BeautifulSoup
 from scrapy.crawler import CrawlerProcess
-from urllib.parse import urljoin, urlparse
-from w3lib.url import safe_url_string
+from urllib.parse import urlparse
+from extraccion import primero, json_ld_noticia, parrafos, recortar, modo_extraccion, PARRAFOS
+from ajustes import ajustes
+from frontera import LANACION as FRONTERA, contar_descarga
+from metricas import rechazo, mostrar_articulos
 
 class lanacionSpider(scrapy.Spider):
     name = 'lanacion'
     allowed_domains = ['www.lanacion.com.ar']
     start_urls = ['https://www.lanacion.com.ar/']
+    extraccion = (PARRAFOS, 1)  # Primer párrafo válido (EXTRACCION_MODO/EXTRACCION_LIMITE lo cambian)
 
-    custom_settings = {
-        'USER_AGENT': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-        'LOG_LEVEL': 'INFO',
-        'FEED_EXPORT_ENCODING': 'utf-8',
-        'DOWNLOAD_DELAY': 2,
-        'CONCURRENT_REQUESTS': 1,
-        'RETRY_TIMES': 2
-    }
+    # Ajustes comunes (pipelines, rastreo incremental, AutoThrottle) en ajustes.py
+    custom_settings = ajustes(
+        LOG_LEVEL='INFO',
+        RETRY_TIMES=2,
+        NOTICIAS_DIR='lanacion_articles'
+    )
 
     def parse(self, response):
-        # Seguimiento mejorado de enlaces
-        for link in response.css('a::attr(href)').getall():
-            try:
-                absolute_url = urljoin(response.url, safe_url_string(link))
-                if self.is_valid_url(absolute_url):
-                    yield response.follow(absolute_url, self.parse)
-            except Exception as e:
-                self.logger.error(f"Error en enlace: {link} - {str(e)}")
+        # Seguimiento de enlaces: la frontera descarta recursos/autores y prioriza las noticias
+        yield from FRONTERA.enlaces(response, self.parse, self.crawler.stats)
 
         # Procesar datos estructurados
-        for script in response.css('script[type="application/ld+json"]'):
-            try:
-                data = json.loads(script.css('::text').get().strip())
-                if isinstance(data, list):
-                    for item in data:
-                        if self.is_news_article(item):
-                            yield from self.process_article(item, response, response.url)
-                else:
-                    if self.is_news_article(data):
-                        yield from self.process_article(data, response, response.url)
-            except Exception as e:
-                self.logger.error(f"Error en JSON-LD: {str(e)}")
+        con_articulo = False
+        for item in self.parse_json_ld(response):
+            con_articulo = True
+            yield item
+        contar_descarga(self.crawler.stats, response, con_articulo)
+
+    def parse_json_ld(self, response):
+        # Solo parsea los bloques candidatos y se queda con el primer NewsArticle
+        data = json_ld_noticia(response, self.is_news_article, self.error_json_ld)
+        if data is not None:
+            yield from self.process_article(data, response, response.url)
+
+    def error_json_ld(self, e):
+        rechazo(self, 'json_ld')
+        self.logger.error(f"Error en JSON-LD: {str(e)}")
 
     def is_valid_url(self, url):
-        """Filtra URLs válidas para artículos"""
-        parsed = urlparse(url)
-        return (
-            'lanacion.com.ar' in parsed.netloc and
-            '/autor/' not in url and
-            any(kw in url for kw in ['/politica/', '/economia/', '/sociedad/', '/cultura/', '/deportes/'])
-        )
+        """Filtra URLs válidas para artículos (ver frontera.py)"""
+        return FRONTERA.clasificar(url) is not None
 
     def is_news_article(self, data):
         article_type = data.get('@type', [])
@@ -65,17 +55,18 @@ class lanacionSpider(scrapy.Spider):
         date = data.get('datePublished', '')[:10]
         section = self.extract_section(url)
         
-        # Extracción de contenido actualizada
-        soup = BeautifulSoup(response.text, 'html.parser')
-        content = self.extract_content(soup)
+        # Extracción de contenido actualizada (reutiliza el árbol ya parseado de la respuesta)
+        content = self.extract_content(response)
         
         # Validación mejorada
         if not self.valid_article(title, content):
+            rechazo(self, 'articulo_invalido')
             self.logger.warning(f"Artículo inválido: {url}")
             return
 
-        # Guardado y visualización
-        self.save_article(url, title, date, section, content)
+        # Visualización opcional (el guardado lo hace JsonlShardPipeline)
+        if mostrar_articulos(self):
+            self.print_article(url, title, date, section, content)
         yield {
             'url': url,
             'title': title,
@@ -92,54 +83,26 @@ class lanacionSpider(scrapy.Spider):
         except:
             return 'general'
 
-    def extract_content(self, soup):
+    def extract_content(self, response):
         """Nuevos selectores para contenido actualizados el 2024"""
         # Intentar múltiples estrategias de extracción
-        content = ""
-        
         # Estrategia 1: Buscar contenedor principal
-        body = soup.find('div', class_='article-body') or \
-              soup.find('article', class_='article-main') or \
-              soup.find('div', {'data-article-body': True})
+        body = primero(response, 'div.article-body', 'article.article-main', 'div[data-article-body]')
         
-        # Estrategia 2: Buscar primer párrafo con texto sustancial
-        if body:
-            for p in body.find_all('p'):
-                text = p.get_text(strip=True)
-                if len(text) > 50 and not any(kw in text.lower() for kw in ['publicidad', 'seguí leyendo']):
-                    content = text
-                    break
+        # Estrategia 2: Párrafos con texto sustancial, hasta agotar el presupuesto (sin recorrer el resto)
+        if body is not None:
+            textos = parrafos(body.css('p'), filtro=lambda text: len(text) > 50 and not any(
+                kw in text.lower() for kw in ['publicidad', 'seguí leyendo']))
         else:
-            # Fallback: Buscar cualquier párrafo largo
-            paragraphs = [p.get_text(strip=True) for p in soup.find_all('p') if len(p.get_text(strip=True)) > 100]
-            content = paragraphs[0] if paragraphs else ""
+            # Fallback: Párrafos largos de toda la página
+            textos = parrafos(response.css('p'), filtro=lambda text: len(text) > 100)
         
-        return content
+        return recortar(textos, *modo_extraccion(self))
 
     def valid_article(self, title, content):
         return len(title) > 15 and len(content) > 80
 
-    def save_article(self, url, title, date, section, content):
-        # Crear directorios
-        base_dir = 'lanacion_articles'
-        section_dir = os.path.join(base_dir, section)
-        os.makedirs(section_dir, exist_ok=True)
-        
-        # Generar nombre de archivo
-        filename = os.path.join(section_dir, f"{random.getrandbits(64)}.json")
-        
-        # Crear y guardar datos
-        article_data = {
-            'url': url,
-            'title': title,
-            'date': date,
-            'section': section,
-            'content': content
-        }
-        
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(article_data, f, indent=2, ensure_ascii=False)
-        
+    def print_article(self, url, title, date, section, content):
         # Mostrar preview detallado
         print("\n" + "="*70)
         print(f"NUEVO ARTÍCULO [{section.upper()}]")
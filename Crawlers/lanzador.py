@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+# Lanza los cinco spiders a la vez en un único CrawlerProcess (un solo reactor).
+# Cada periódico tiene su propio slot de descarga, así que mientras uno espera
+# por AutoThrottle los demás siguen descargando.
+#
+# Uso:
+#   python lanzador.py                         # los cinco periódicos
+#   python lanzador.py --spiders elpais clarin
+#   python lanzador.py --mock --articulos 500  # contra servidorMock.py, sin red
+#   python lanzador.py --extraccion tokens --limite 512  # cuerpo más largo que el primer párrafo
+#   python lanzador.py --grabar grabaciones     # guarda las respuestas en grabaciones/<spider>.arc.gz
+#   python lanzador.py --reproducir grabaciones # vuelve a rastrear desde esos archivos, sin red
+#                                               # (con las mismas opciones que al grabar, p. ej. --mock)
+import argparse
+import importlib
+import os
+import sys
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from scrapy.crawler import CrawlerProcess
+
+# Permite lanzarlo desde cualquier carpeta: los spiders importan los módulos de aquí
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from ajustes import USER_AGENT
+
+# nombre -> (módulo, clase)
+SPIDERS = {
+    '20minutos': ('20minutos', 'VeinteMinutosSpider'),
+    'clarin': ('clarin', 'ClarinSpider'),
+    'elmundo': ('elMundo', 'ElMundoSpider'),
+    'elpais': ('elPais', 'ElPaisSpider'),
+    'lanacion': ('lanacion', 'lanacionSpider'),
+}
+
+
+def cargar_spider(nombre):
+    modulo, clase = SPIDERS[nombre]
+    return getattr(importlib.import_module(modulo), clase)
+
+
+def urls_mock(spidercls, puerto):
+    """start_urls del spider apuntando al servidor local (mismo host, http y otro puerto)"""
+    return [urlparse(u)._replace(scheme='http', netloc=f'{urlparse(u).hostname}:{puerto}').geturl()
+            for u in spidercls.start_urls]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Lanza todos los spiders en un solo proceso')
+    parser.add_argument('--spiders', nargs='+', choices=sorted(SPIDERS), default=sorted(SPIDERS))
+    parser.add_argument('--mock', action='store_true', help='Rastrear servidorMock.py en lugar de los periódicos')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--articulos', type=int, default=1000, help='(--mock) artículos por periódico')
+    parser.add_argument('--latencia', type=float, default=0.05, help='(--mock) segundos por respuesta')
+    parser.add_argument('--extraccion', choices=('parrafos', 'tokens', 'completo'),
+                        help='Cuánto cuerpo guardar (por defecto, lo de cada spider)')
+    parser.add_argument('--limite', type=int, help='(--extraccion) número de párrafos o de palabras')
+    archivo = parser.add_mutually_exclusive_group()
+    archivo.add_argument('--grabar', metavar='DIR', help='Guardar las respuestas descargadas en DIR (ver archivo.py)')
+    archivo.add_argument('--reproducir', metavar='DIR', help='Responder desde los archivos de DIR en lugar de la red')
+    args = parser.parse_args()
+    if args.extraccion in ('parrafos', 'tokens') and not (args.limite and args.limite > 0):
+        parser.error(f'--extraccion {args.extraccion} necesita un --limite positivo')
+
+    settings = {'USER_AGENT': USER_AGENT, 'LOG_LEVEL': 'WARNING'}
+    if args.extraccion:
+        settings['EXTRACCION_MODO'] = args.extraccion
+        settings['EXTRACCION_LIMITE'] = args.limite
+    if args.grabar or args.reproducir:
+        settings['ARCHIVO_MODO'] = 'grabar' if args.grabar else 'reproducir'
+        settings['ARCHIVO_DIR'] = os.path.abspath(args.grabar or args.reproducir)
+    if args.mock:
+        import servidorMock
+        servidorMock.arrancar(args.puerto, args.articulos, args.latencia)
+        settings['DNS_RESOLVER'] = 'servidorMock.ResolverLocal'
+        # Salida e índices en una carpeta temporal para no mezclarlos con los reales
+        os.chdir(tempfile.mkdtemp(prefix='crawl_mock_'))
+        print(f"Modo mock: salida en {os.getcwd()}")
+    elif args.reproducir:
+        # Igual que en mock: la reproducción no debe tocar la salida ni los índices reales
+        os.chdir(tempfile.mkdtemp(prefix='crawl_reproducir_'))
+        print(f"Reproduciendo {settings['ARCHIVO_DIR']}: salida en {os.getcwd()}")
+
+    process = CrawlerProcess(settings=settings)
+    crawlers = {}
+    for nombre in args.spiders:
+        spidercls = cargar_spider(nombre)
+        crawlers[nombre] = process.create_crawler(spidercls)
+        kwargs = {'start_urls': urls_mock(spidercls, args.puerto)} if args.mock else {}
+        process.crawl(crawlers[nombre], **kwargs)
+
+    print(f"Iniciando {len(crawlers)} spiders: {', '.join(crawlers)}")
+    t0 = time.time()
+    process.start()
+    dt = time.time() - t0
+
+    # Resumen de rendimiento por spider
+    total = 0
+    for nombre, crawler in crawlers.items():
+        stats = crawler.stats.get_stats()
+        paginas = stats.get('response_received_count', 0)
+        total += paginas
+        print(f"{nombre:<10} páginas: {paginas:>6}  artículos: {stats.get('item_scraped_count', 0):>6}  "
+              f"({paginas / dt:.1f} páginas/s)")
+    print(f"Total: {total} páginas en {dt:.1f} s ({total / dt:.1f} páginas/s)")
+
+
+if __name__ == '__main__':
+    main()
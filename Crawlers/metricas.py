@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+# Métricas de rendimiento y de extracción de cada spider.
+#
+# MetricasExtension calcula cada METRICAS_INTERVALO segundos (y al cerrar):
+#   - páginas/s, artículos/s y bytes descargados (de las stats de Scrapy)
+#   - tiempo medio de parse por página (medido por TiempoParseMiddleware)
+#   - motivos de rechazo: rechazos/<motivo>, que los spiders cuentan con rechazo()
+# y lo escribe en METRICAS_DIR/metricas-<spider>.json o, con METRICAS_FORMATO =
+# 'prometheus', en metricas-<spider>.prom (formato de texto de Prometheus, para
+# el textfile collector de node_exporter).
+#
+# La salida por consola de los artículos (print/logger de cada spider) queda
+# desactivada salvo con MOSTRAR_ARTICULOS = True, porque frena el rastreo.
+import json
+import os
+import time
+
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from twisted.internet import task
+
+
+def rechazo(spider, motivo):
+    """Cuenta una página o bloque descartado por 'motivo' (rechazos/<motivo> en las stats)"""
+    spider.crawler.stats.inc_value(f'rechazos/{motivo}')
+
+
+def mostrar_articulos(spider):
+    return spider.settings.getbool('MOSTRAR_ARTICULOS')
+
+
+class TiempoParseMiddleware:
+    """Spider middleware que mide el tiempo que pasa el callback generando resultados"""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
+
+    def process_spider_output(self, response, result, spider):
+        # Solo cuenta lo que tarda el callback en dar cada resultado, no lo que
+        # hace Scrapy con ellos después (planificar peticiones, pipelines...)
+        resultados = iter(result)
+        segundos = 0.0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    r = next(resultados)
+                except StopIteration:
+                    break
+                finally:
+                    segundos += time.perf_counter() - t0
+                yield r
+        finally:
+            self.contar(segundos)
+
+    async def process_spider_output_async(self, response, result, spider):
+        # Misma medida para callbacks asíncronos (y las versiones de Scrapy que los usan siempre)
+        resultados = result.__aiter__()
+        segundos = 0.0
+        try:
+            while True:
+                t0 = time.perf_counter()
+                try:
+                    r = await resultados.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    segundos += time.perf_counter() - t0
+                yield r
+        finally:
+            self.contar(segundos)
+
+    def contar(self, segundos):
+        self.stats.inc_value('metricas/parse_segundos', segundos)
+        self.stats.inc_value('metricas/paginas_parseadas')
+
+
+class MetricasExtension:
+    """Exporta periódicamente las métricas del spider a JSON o a texto de Prometheus"""
+
+    def __init__(self, crawler, directorio, formato, intervalo):
+        self.crawler = crawler
+        self.stats = crawler.stats
+        self.directorio = directorio
+        self.formato = formato
+        self.intervalo = intervalo
+        self.tarea = None
+        self.inicio = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('METRICAS_ENABLED', True):
+            raise NotConfigured
+        formato = crawler.settings.get('METRICAS_FORMATO', 'json')
+        if formato not in ('json', 'prometheus'):
+            raise NotConfigured(f"METRICAS_FORMATO desconocido: {formato}")
+        ext = cls(crawler,
+                  crawler.settings.get('METRICAS_DIR', '.'),
+                  formato,
+                  crawler.settings.getfloat('METRICAS_INTERVALO', 30.0))
+        crawler.signals.connect(ext.spider_opened, signal=signals.spider_opened)
+        crawler.signals.connect(ext.spider_closed, signal=signals.spider_closed)
+        return ext
+
+    def spider_opened(self, spider):
+        self.inicio = time.time()
+        if self.intervalo > 0:
+            self.tarea = task.LoopingCall(self.exportar, spider)
+            self.tarea.start(self.intervalo, now=False)
+
+    def spider_closed(self, spider, reason):
+        if self.tarea is not None and self.tarea.running:
+            self.tarea.stop()
+        self.exportar(spider)
+
+    def metricas(self, spider):
+        stats = self.stats.get_stats()
+        segundos = max(time.time() - self.inicio, 1e-9)
+        paginas = stats.get('response_received_count', 0)
+        articulos = stats.get('item_scraped_count', 0)
+        parseadas = stats.get('metricas/paginas_parseadas', 0)
+        return {
+            'spider': spider.name,
+            'segundos': round(segundos, 3),
+            'paginas': paginas,
+            'articulos': articulos,
+            'bytes': stats.get('downloader/response_bytes', 0),
+            'paginas_por_segundo': paginas / segundos,
+            'articulos_por_segundo': articulos / segundos,
+            'parse_medio_ms': 1000 * stats.get('metricas/parse_segundos', 0.0) / parseadas if parseadas else 0.0,
+            'rechazos': {k.split('/', 1)[1]: v for k, v in stats.items() if k.startswith('rechazos/')},
+        }
+
+    def exportar(self, spider):
+        m = self.metricas(spider)
+        spider.logger.info(
+            "Métricas: %.1f páginas/s, %.1f artículos/s, %.1f KB, parse medio %.1f ms, rechazos %s",
+            m['paginas_por_segundo'], m['articulos_por_segundo'], m['bytes'] / 1024,
+            m['parse_medio_ms'], m['rechazos'] or '-')
+
+        os.makedirs(self.directorio, exist_ok=True)
+        if self.formato == 'prometheus':
+            path = os.path.join(self.directorio, f'metricas-{spider.name}.prom')
+            contenido = self.prometheus(m)
+        else:
+            path = os.path.join(self.directorio, f'metricas-{spider.name}.json')
+            contenido = json.dumps(m, ensure_ascii=False, indent=2)
+        # Escritura atómica: quien lo lea nunca ve un fichero a medias
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(contenido + '\n')
+        os.replace(path + '.tmp', path)
+
+    def prometheus(self, m):
+        etiqueta = f'spider="{m["spider"]}"'
+        lineas = []
+        for nombre, tipo, valor in (
+            ('noticias_paginas_total', 'counter', m['paginas']),
+            ('noticias_articulos_total', 'counter', m['articulos']),
+            ('noticias_bytes_total', 'counter', m['bytes']),
+            ('noticias_paginas_por_segundo', 'gauge', m['paginas_por_segundo']),
+            ('noticias_articulos_por_segundo', 'gauge', m['articulos_por_segundo']),
+            ('noticias_parse_medio_segundos', 'gauge', m['parse_medio_ms'] / 1000),
+        ):
+            lineas.append(f'# TYPE {nombre} {tipo}')
+            lineas.append(f'{nombre}{{{etiqueta}}} {valor}')
+        lineas.append('# TYPE noticias_rechazos_total counter')
+        for motivo, n in sorted(m['rechazos'].items()):
+            lineas.append(f'noticias_rechazos_total{{{etiqueta},motivo="{motivo}"}} {n}')
+        return '\n'.join(lineas)
@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+# Pipelines de Scrapy compartidos por todos los spiders.
+#
+# JsonlShardPipeline sustituye al antiguo save_article (un .json con nombre
+# aleatorio por artículo y un os.makedirs en cada llamada). Los artículos se
+# acumulan en memoria y se escriben por lotes en ficheros JSONL rotados
+# ("fragmentos"), opcionalmente comprimidos con zstd:
+#
+#   <NOTICIAS_DIR>/<spider>-<fecha>-<pid>-<n>.jsonl[.zst]
+#
+# Cada línea es un artículo con una clave "id" derivada del hash de la URL,
+# de modo que el mismo artículo siempre tiene el mismo identificador.
+import hashlib
+import json
+import os
+import time
+
+try:
+    import zstandard
+except ImportError:  # zstd es opcional
+    zstandard = None
+
+
+def clave_url(url):
+    """Identificador estable de un artículo a partir de su URL"""
+    return hashlib.sha1(url.strip().encode('utf-8')).hexdigest()[:16]
+
+
+class JsonlShardPipeline:
+    """Escribe los items en fragmentos JSONL por lotes, rotando cada N artículos"""
+
+    def __init__(self, base_dir, lote, por_fragmento, compresion):
+        self.base_dir = base_dir
+        self.lote = lote
+        self.por_fragmento = por_fragmento
+        self.compresion = compresion
+        self.buffer = []
+        self.fichero = None
+        self.escritor = None
+        self.en_fragmento = 0
+        self.n_fragmento = 0
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        settings = crawler.settings
+        return cls(
+            base_dir=settings.get('NOTICIAS_DIR') or crawler.spidercls.name,
+            lote=settings.getint('NOTICIAS_LOTE', 200),
+            por_fragmento=settings.getint('NOTICIAS_POR_FRAGMENTO', 10000),
+            compresion=settings.get('NOTICIAS_COMPRESION'),
+        )
+
+    def open_spider(self, spider):
+        if self.compresion == 'zstd' and zstandard is None:
+            spider.logger.warning("zstandard no está instalado: los fragmentos se guardarán sin comprimir")
+            self.compresion = None
+        os.makedirs(self.base_dir, exist_ok=True)  # una sola vez por ejecución
+        self.prefijo = f"{spider.name}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+
+    def close_spider(self, spider):
+        self.flush()
+        self.cerrar_fragmento()
+
+    def process_item(self, item, spider):
+        articulo = dict(item)
+        articulo.setdefault('id', clave_url(articulo['url']))
+        self.buffer.append(json.dumps(articulo, ensure_ascii=False))
+        if len(self.buffer) >= self.lote:
+            self.flush()
+        return item
+
+    def flush(self):
+        # Vuelca el lote acumulado, repartiéndolo entre fragmentos si hace falta
+        while self.buffer:
+            if self.fichero is None:
+                self.abrir_fragmento()
+            hueco = self.por_fragmento - self.en_fragmento
+            lineas, self.buffer = self.buffer[:hueco], self.buffer[hueco:]
+            datos = ('\n'.join(lineas) + '\n').encode('utf-8')
+            if self.escritor is not None:
+                self.escritor.write(datos)
+                # Cada lote es un frame zstd completo: el fichero es legible aunque el crawler muera
+                self.escritor.flush(zstandard.FLUSH_FRAME)
+            else:
+                self.fichero.write(datos)
+            self.fichero.flush()
+            self.en_fragmento += len(lineas)
+            if self.en_fragmento >= self.por_fragmento:
+                self.cerrar_fragmento()
+
+    def abrir_fragmento(self):
+        extension = '.jsonl.zst' if self.compresion == 'zstd' else '.jsonl'
+        nombre = os.path.join(self.base_dir, f"{self.prefijo}-{self.n_fragmento:04d}{extension}")
+        self.fichero = open(nombre, 'ab')
+        if self.compresion == 'zstd':
+            self.escritor = zstandard.ZstdCompressor(level=3).stream_writer(self.fichero, closefd=False)
+        self.en_fragmento = 0
+        self.n_fragmento += 1
+
+    def cerrar_fragmento(self):
+        if self.escritor is not None:
+            self.escritor.close()
+            self.escritor = None
+        if self.fichero is not None:
+            self.fichero.close()
+            self.fichero = None
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+# Servidor HTTP local que imita a los cinco periódicos para medir el rendimiento
+# de los spiders sin red.
+#
+# Todas las peticiones llegan al mismo puerto; el periódico se distingue por la
+# cabecera Host (ResolverLocal hace que cualquier dominio resuelva a 127.0.0.1).
+# Cada sitio tiene portadas paginadas en /politica/portada-<k>.html y artículos
+# en /politica/noticia/<n>.html. La misma plantilla de artículo lleva los
+# selectores y el JSON-LD que busca cada spider, así vale para todos.
+#
+# Uso: python servidorMock.py [--puerto 8765] [--articulos 1000] [--latencia 0.05]
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from twisted.internet import defer
+from scrapy.resolver import CachingThreadedResolver
+
+POR_PORTADA = 50
+PALABRAS = ('gobierno ley tribunal mercado empresa ciudad partido acuerdo informe datos '
+            'ministro sector precio reforma proyecto región equipo consejo medida plan').split()
+
+
+class ResolverLocal(CachingThreadedResolver):
+    """Resuelve cualquier dominio a 127.0.0.1 (para usar con DNS_RESOLVER)"""
+
+    def getHostByName(self, name, timeout=()):
+        return defer.succeed('127.0.0.1')
+
+
+def parrafo(semilla, n_palabras=60):
+    azar = random.Random(semilla)
+    return ' '.join(azar.choice(PALABRAS) for _ in range(n_palabras)).capitalize() + '.'
+
+
+def portada(host, k, n_articulos):
+    primero = (k - 1) * POR_PORTADA
+    enlaces = ''.join(
+        f'<article><a href="http://{host}/politica/noticia/{n}.html">Noticia {n}</a></article>'
+        for n in range(primero, min(primero + POR_PORTADA, n_articulos))
+    )
+    siguiente = ''
+    if primero + POR_PORTADA < n_articulos:
+        siguiente = f'<a rel="next" href="http://{host}/politica/portada-{k + 1}.html">Siguiente</a>'
+    return f'<html><body>{enlaces}{siguiente}</body></html>'
+
+
+def articulo(host, n):
+    titulo = f'Noticia número {n} de {host} sobre la actualidad política'
+    cuerpo = parrafo(f'{host}-{n}')
+    ld = json.dumps({
+        '@context': 'https://schema.org', '@type': 'NewsArticle', 'headline': titulo,
+        'datePublished': '2024-05-01T10:00:00Z', 'articleSection': 'Política',
+    }, ensure_ascii=False)
+    return (
+        '<html><head>'
+        '<meta property="article:published_time" content="2024-05-01T10:00:00Z">'
+        f'<script type="application/ld+json">{ld}</script>'
+        '</head><body>'
+        f'<h1 class="article-title" itemprop="headline">{titulo}</h1>'
+        '<time itemprop="datePublished" datetime="2024-05-01T10:00:00Z">1 de mayo</time>'
+        f'<div class="article-text"><p class="paragraph">{cuerpo}</p></div>'
+        f'<div class="article-body" data-dtm-region="articulo_cuerpo"><p>{cuerpo}</p></div>'
+        f'<p class="ue-c-article__paragraph">{cuerpo}</p>'
+        f'<a href="http://{host}/">Portada</a>'
+        '</body></html>'
+    )
+
+
+def crear_manejador(n_articulos, latencia):
+    class Manejador(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            if latencia:
+                time.sleep(latencia)  # simula el tiempo de respuesta del periódico
+            host = self.headers.get('Host', 'localhost')
+            ruta = self.path.split('?')[0]
+
+            if ruta in ('/', '/politica/portada-1.html'):
+                html = portada(host, 1, n_articulos)
+            elif ruta.startswith('/politica/portada-'):
+                html = portada(host, int(ruta.rsplit('-', 1)[1].split('.')[0]), n_articulos)
+            elif ruta.startswith('/politica/noticia/'):
+                html = articulo(host, int(ruta.rsplit('/', 1)[1].split('.')[0]))
+            else:
+                self.send_error(404)
+                return
+
+            datos = html.encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, *args):
+            pass
+
+    return Manejador
+
+
+def arrancar(puerto=8765, n_articulos=1000, latencia=0.0):
+    """Arranca el servidor en un hilo aparte y lo devuelve (servidor.shutdown() para pararlo)"""
+    servidor = ThreadingHTTPServer(('127.0.0.1', puerto), crear_manejador(n_articulos, latencia))
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Servidor local que imita a los periódicos')
+    parser.add_argument('--puerto', type=int, default=8765)
+    parser.add_argument('--articulos', type=int, default=1000, help='Artículos por periódico')
+    parser.add_argument('--latencia', type=float, default=0.0, help='Segundos de espera por respuesta')
+    args = parser.parse_args()
+
+    servidor = ThreadingHTTPServer(('127.0.0.1', args.puerto), crear_manejador(args.articulos, args.latencia))
+    print(f"Servidor de prueba en http://127.0.0.1:{args.puerto}/ ({args.articulos} artículos por periódico)")
+    servidor.serve_forever()
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Rastreo incremental compartido entre ejecuciones.
+#
+# IncrementalMiddleware guarda en un índice SQLite (NOTICIAS_INDICE, por defecto
+# vistos.sqlite3) las URLs ya visitadas por cualquier spider:
+#   - Las URLs de las que ya se guardó un artículo no se vuelven a descargar.
+#   - El resto (portadas, secciones, páginas sin artículo válido) se piden con
+#     If-None-Match / If-Modified-Since; si el servidor responde 304 la página no
+#     ha cambiado, sus enlaces ya se siguieron en la ejecución anterior y se descarta.
+import sqlite3
+import time
+
+from scrapy import signals
+from scrapy.exceptions import IgnoreRequest, NotConfigured
+
+from pipelines import clave_url
+
+# Una sola conexión por fichero y proceso: SQLite solo admite un escritor a la vez,
+# y varios spiders (o este middleware y duplicados.py) comparten el mismo índice
+_conexiones = {}
+
+
+def abrir_indice(path):
+    """Conexión compartida al índice (se cuenta cuántos la usan)"""
+    if path not in _conexiones:
+        conn = sqlite3.connect(path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        _conexiones[path] = [conn, 0]
+    _conexiones[path][1] += 1
+    return _conexiones[path][0]
+
+
+def cerrar_indice(path):
+    conn, usuarios = _conexiones[path]
+    conn.commit()
+    if usuarios == 1:
+        conn.close()
+        del _conexiones[path]
+    else:
+        _conexiones[path][1] -= 1
+
+
+class IndiceVistos:
+    """Índice en disco de URLs vistas, con sus cabeceras de validación"""
+
+    def __init__(self, path, commit_cada=200):
+        self.path = path
+        self.conn = abrir_indice(path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS vistos ('
+            ' clave TEXT PRIMARY KEY, url TEXT, articulo INTEGER DEFAULT 0,'
+            ' etag TEXT, last_modified TEXT, visto REAL)'
+        )
+        self.commit_cada = commit_cada
+        self.pendientes = 0
+
+    def es_articulo(self, url):
+        fila = self.conn.execute('SELECT articulo FROM vistos WHERE clave = ?', (clave_url(url),)).fetchone()
+        return bool(fila and fila[0])
+
+    def validadores(self, url):
+        """(etag, last_modified) guardados para la URL, o (None, None)"""
+        fila = self.conn.execute('SELECT etag, last_modified FROM vistos WHERE clave = ?', (clave_url(url),)).fetchone()
+        return fila if fila else (None, None)
+
+    def marcar_visita(self, url, etag, last_modified):
+        self.conn.execute(
+            'INSERT INTO vistos (clave, url, etag, last_modified, visto) VALUES (?, ?, ?, ?, ?)'
+            ' ON CONFLICT(clave) DO UPDATE SET etag = excluded.etag,'
+            ' last_modified = excluded.last_modified, visto = excluded.visto',
+            (clave_url(url), url, etag, last_modified, time.time())
+        )
+        self._commit()
+
+    def marcar_articulo(self, url):
+        self.conn.execute(
+            'INSERT INTO vistos (clave, url, articulo, visto) VALUES (?, ?, 1, ?)'
+            ' ON CONFLICT(clave) DO UPDATE SET articulo = 1',
+            (clave_url(url), url, time.time())
+        )
+        self._commit()
+
+    def _commit(self):
+        # Las escrituras se agrupan para no hacer un fsync por página
+        self.pendientes += 1
+        if self.pendientes >= self.commit_cada:
+            self.conn.commit()
+            self.pendientes = 0
+
+    def cerrar(self):
+        cerrar_indice(self.path)
+
+
+class IncrementalMiddleware:
+    """Downloader middleware que evita volver a descargar lo que ya se guardó"""
+
+    def __init__(self, indice, stats):
+        self.indice = indice
+        self.stats = stats
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not crawler.settings.getbool('INCREMENTAL_ENABLED', True):
+            raise NotConfigured
+        indice = IndiceVistos(crawler.settings.get('NOTICIAS_INDICE', 'vistos.sqlite3'))
+        mw = cls(indice, crawler.stats)
+        crawler.signals.connect(mw.item_scraped, signal=signals.item_scraped)
+        crawler.signals.connect(mw.item_dropped, signal=signals.item_dropped)
+        crawler.signals.connect(mw.spider_closed, signal=signals.spider_closed)
+        return mw
+
+    def process_request(self, request, spider):
+        if self.indice.es_articulo(request.url):
+            self.stats.inc_value('incremental/articulo_ya_guardado', spider=spider)
+            raise IgnoreRequest(f"Artículo ya guardado: {request.url}")
+
+        # Petición condicional con lo que devolvió el servidor la última vez
+        etag, last_modified = self.indice.validadores(request.url)
+        if etag:
+            request.headers.setdefault('If-None-Match', etag)
+        if last_modified:
+            request.headers.setdefault('If-Modified-Since', last_modified)
+        return None
+
+    def process_response(self, request, response, spider):
+        if response.status == 304:
+            self.stats.inc_value('incremental/no_modificado', spider=spider)
+            raise IgnoreRequest(f"Sin cambios desde la última visita: {request.url}")
+
+        if response.status == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            self.indice.marcar_visita(
+                response.url,
+                etag.decode('latin-1') if etag else None,
+                last_modified.decode('latin-1') if last_modified else None,
+            )
+        return response
+
+    def item_scraped(self, item, response, spider):
+        # Solo se marca como artículo cuando el item ha pasado por los pipelines
+        self.indice.marcar_articulo(item['url'])
+
+    def item_dropped(self, item, response, exception, spider):
+        # Los casi duplicados descartados tampoco hace falta volver a descargarlos
+        self.indice.marcar_articulo(item['url'])
+
+    def spider_closed(self, spider):
+        self.indice.cerrar()
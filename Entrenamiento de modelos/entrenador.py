@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Entrenador común de todos los modelos (antes había un script copiado por modelo
+# que solo cambiaba modelName y output_dir). Los modelos están en MODELOS; se
+# pueden entrenar uno o varios en el mismo proceso: los datos se cargan una vez y
+# cada tokenizador distinto tokeniza una sola vez aunque lo usen varios modelos.
+# Lo tokenizado se guarda en disco (tokenizacion.py), así que al repetir un
+# entrenamiento, o al evaluar con clasificationReport.py, no se vuelve a tokenizar.
+# Los lotes se agrupan por longitud (lotes.py) para no gastar cómputo en padding,
+# y con --max-tokens se llenan hasta un presupuesto de tokens en vez de 8 ejemplos.
+#
+# Uso:
+#   python entrenador.py train.parquet test.parquet --modelos beto maria
+#   python entrenador.py train.parquet test.parquet --modelos todos
+#   python entrenador.py train.parquet test.parquet --modelos beto --max-tokens 4096
+#   python beto.py train.parquet test.parquet      # los scripts de siempre siguen valiendo
+
+# imports
+import argparse
+import functools
+import gc
+import os, sys, torch
+import numpy as np
+from torch.utils.data import (WeightedRandomSampler, DataLoader)
+from transformers import (AutoTokenizer, AutoModelForSequenceClassification, Trainer, TrainingArguments, DataCollatorWithPadding)
+from sklearn.metrics import accuracy_score, f1_score
+
+# datos.py está en la raíz del repositorio
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from datos import cargar_dataset
+from tokenizacion import tokenizar_con_cache
+from lotes import (SamplerLongitudBalanceado, SamplerPorLongitud, SamplerPresupuestoBalanceado,
+                   eficiencia_padding, longitudes, lotes_de, lotes_por_tokens)
+from ponderacion import (PerdidaPonderada, SamplerEstratificado, SorteoEstratificado, pesos_clase, pesos_muestra)
+
+# Registro de modelos: checkpoint de HuggingFace, carpeta de salida, longitud máxima
+# en tokens y batch size por dispositivo
+MODELOS = {
+    "albeto"    : {"nombre": "CenIA/albert-base-spanish",                   "salida": "./albeto",     "max_length": 512, "batch_size": 8},
+    "bertin"    : {"nombre": "bertin-project/bertin-roberta-base-spanish",  "salida": "./bertin",     "max_length": 512, "batch_size": 8},
+    "beto"      : {"nombre": "dccuchile/bert-base-spanish-wwm-cased",       "salida": "./beto",       "max_length": 512, "batch_size": 8},
+    "distilbert": {"nombre": "distilbert-base-uncased",                     "salida": "./distilbert", "max_length": 512, "batch_size": 8},
+    "distilbeto": {"nombre": "dccuchile/distilbert-base-spanish-uncased",   "salida": "./distilbeto", "max_length": 512, "batch_size": 8},
+    "maria"     : {"nombre": "PlanTL-GOB-ES/roberta-base-bne",              "salida": "./maria",      "max_length": 512, "batch_size": 8},
+    "mdeberta"  : {"nombre": "microsoft/mdeberta-v3-base",                  "salida": "./mdeberta",   "max_length": 512, "batch_size": 8},
+    "twhin"     : {"nombre": "Twitter/twhin-bert-base",                     "salida": "./twhin",      "max_length": 512, "batch_size": 8},
+}
+
+
+# Cargar datos: el Parquet se memory-mapea con Arrow sin pasar por pandas (el CSV sigue valiendo).
+# Solo hace falta si algún tokenizador no tiene ya el fichero en la caché, y entonces una vez
+@functools.lru_cache(maxsize=None)
+def cargar_datos(path):
+    ds = cargar_dataset(path)
+    # Comprobamos que tiene todo
+    if not {"text", "label"}.issubset(ds.column_names):
+        sys.exit("CSV debe tener columnas 'text' y 'label'")
+    return ds
+
+
+# train y test tokenizados con el tokenizador de un modelo (de la caché si ya están)
+def tokenizar(trainPath, testPath, tokenizer, max_length, num_proc):
+    tokenizados = []
+    for path in (trainPath, testPath):
+        ds = tokenizar_con_cache(path, tokenizer, max_length, cargar=cargar_datos, num_proc=num_proc)
+        # Limitamos el formato para que el collator solo vea tensores
+        ds.set_format(type="torch", columns=["input_ids", "attention_mask", "label"])
+        tokenizados.append(ds)
+    return tokenizados
+
+
+# sampler balanceado: hace que cada batch llegue 50 / 50.
+# Con las longitudes, además agrupa en cada lote ejemplos de longitud parecida,
+# y con max_tokens los lotes se llenan hasta ese nº de tokens (con padding) en vez
+# de tener batch_size ejemplos: en ese caso es un batch_sampler que da lotes enteros.
+# muestreo "estratificado" cambia el sorteo con reemplazo por ponderacion.SorteoEstratificado
+def sampler_balanceado(trainLabels, class_weights, lens=None, batch_size=None, max_tokens=None, muestreo="ponderado"):
+    sample_weights = pesos_muestra(trainLabels, class_weights)
+    sorteo = SorteoEstratificado(trainLabels.numpy()) if muestreo == "estratificado" else None
+    if max_tokens:
+        return SamplerPresupuestoBalanceado(lens, sample_weights, max_tokens, sorteo=sorteo), sample_weights
+    if lens is not None:
+        return SamplerLongitudBalanceado(lens, sample_weights, batch_size, sorteo=sorteo), sample_weights
+    if sorteo is not None:
+        return SamplerEstratificado(sorteo), sample_weights
+    return WeightedRandomSampler(sample_weights, num_samples=len(sample_weights), replacement=True), sample_weights
+
+
+# Tokens reales / calculados en una época, con lotes por longitud y con lotes al azar
+def informe_padding(lotes, lens, batch_size):
+    agrupado = eficiencia_padding(lens, lotes)
+    al_azar = eficiencia_padding(lens, lotes_de(np.random.permutation(len(lens)), batch_size))
+    print(f"Eficiencia de padding en train: {agrupado:.1%} agrupando por longitud "
+          f"({al_azar:.1%} al azar con batch {batch_size})")
+
+
+# Con lotes de tamaño variable, la pérdida de cada lote se suma (no se promedia) y
+# se divide por la suma media de pesos de un lote: así cada ejemplo cuenta lo mismo
+# esté en un lote grande o pequeño, y la acumulación de gradiente se elige para que
+# cada paso del optimizador vea unos ejemplos_por_paso ejemplos.
+# Devuelve (normalizador, pasos de acumulación)
+def normalizar_presupuesto(sampler, sample_weights, ejemplos_por_paso):
+    lotes = sampler.primera_epoca()
+    pesos = sample_weights.numpy()
+    media_ejemplos = np.mean([len(lote) for lote in lotes])
+    normalizador = float(np.mean([pesos[lote].sum() for lote in lotes]))
+    acumulacion = max(1, round(ejemplos_por_paso / media_ejemplos))
+    print(f"Lotes de hasta {sampler.max_tokens} tokens: {media_ejemplos:.1f} ejemplos de media, "
+          f"acumulando {acumulacion} → ~{media_ejemplos * acumulacion:.0f} ejemplos por paso")
+    return normalizador, acumulacion
+
+
+class WeightedTrainer(Trainer):
+    def __init__(self, *args, class_weights=None, sampler=None, ordenar_eval=False,
+                 max_tokens=None, normalizador=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # La pérdida se crea una vez, con los pesos ya en el dispositivo
+        self.perdida = PerdidaPonderada(class_weights).to(self.args.device)
+        self.sampler = sampler
+        self.ordenar_eval = ordenar_eval
+        self.max_tokens = max_tokens
+        self.normalizador = normalizador
+
+    # Sobrescribe el cálculo de la pérdida para aplicar pesos de clase
+    def compute_loss(self, model, inputs, return_outputs=False, **kwargs):
+        labels = inputs.pop("labels")                                                  # 1) extraemos las etiquetas
+        outputs = model(**inputs)                                                      # 2) pasamos el resto al modelo
+        logits = outputs.logits                                                        # 3) recuperamos los logits sin normalizar
+        # 4) pérdida ponderada (con lotes por presupuesto de tokens: suma ponderada / suma media de pesos por lote)
+        loss = self.perdida(logits, labels, self.normalizador if model.training else None)
+        return (loss, outputs) if return_outputs else loss                             # 5) devolvemos según lo esperado
+
+    # Sobrescribe el DataLoader para inyectar nuestro sampler balanceado
+    def get_train_dataloader(self):
+        if isinstance(self.sampler, SamplerPresupuestoBalanceado):
+            # el sampler ya da los lotes enteros, cada uno de su tamaño
+            return DataLoader(self.train_dataset, batch_sampler=self.sampler, collate_fn=self.data_collator)
+        return DataLoader(
+            self.train_dataset,                     # usamos el dataset de entrenamiento
+            batch_size=self.args.train_batch_size,  # respetamos el batch size de los args
+            sampler=self.sampler,                   # aplicamos el sampler balanceado
+            collate_fn=self.data_collator           # usamos el collator para padding dinámico
+        )
+
+    # En evaluación el orden no importa para las métricas: de más largo a más corto
+    def get_eval_dataloader(self, eval_dataset=None):
+        if not self.ordenar_eval:
+            return super().get_eval_dataloader(eval_dataset)
+        eval_dataset = eval_dataset if eval_dataset is not None else self.eval_dataset
+        lens = longitudes(eval_dataset)
+        if self.max_tokens:
+            lotes = lotes_por_tokens(SamplerPorLongitud(lens).orden(), lens, self.max_tokens)
+            return DataLoader(eval_dataset, batch_sampler=[lote.tolist() for lote in lotes],
+                              collate_fn=self.data_collator)
+        return DataLoader(
+            eval_dataset,
+            batch_size=self.args.eval_batch_size,
+            sampler=SamplerPorLongitud(lens),
+            collate_fn=self.data_collator
+        )
+
+
+# convertir logits → IDs antes de métricas (profesor)
+def preprocess_logits_for_metrics(logits, labels):
+    pred_ids = torch.argmax(logits, dim=-1)
+    return pred_ids, labels
+
+
+# Cálculo de métricas: extraer el vector de predicciones si viene en tupla
+def compute_metrics(p):
+    preds = p.predictions
+    if isinstance(preds, tuple): preds = preds[0]
+    labels = p.label_ids
+    if isinstance(labels, tuple): labels = labels[0]
+    return {"accuracy": accuracy_score(labels, preds), "f1": f1_score(labels, preds, average="macro")}
+
+
+def entrenar(alias, config, opciones):
+    print(f"\n=== Entrenando {alias} ({config['nombre']}) ===")
+    tokenizer = AutoTokenizer.from_pretrained(config["nombre"])
+    trainTok, testTok = tokenizar(opciones.train, opciones.test, tokenizer, config["max_length"], opciones.num_proc)
+
+    # Cargar modelo binario
+    model = AutoModelForSequenceClassification.from_pretrained(config["nombre"], num_labels=2, id2label={0: "human", 1: "ai"}, label2id={"human": 0, "ai": 1})
+
+    trainLabels = trainTok["label"]  # tensor (set_format torch), sin copia en pandas
+    class_weights = pesos_clase(trainLabels)
+    # Los lotes por presupuesto de tokens siempre se agrupan por longitud
+    agrupar = not opciones.sin_agrupar or bool(opciones.max_tokens)
+    lens = longitudes(trainTok) if agrupar else None
+    sampler, sample_weights = sampler_balanceado(trainLabels, class_weights, lens, config["batch_size"],
+                                                 opciones.max_tokens, opciones.muestreo)
+
+    normalizador, acumulacion = None, 1
+    if opciones.max_tokens:
+        normalizador, acumulacion = normalizar_presupuesto(sampler, sample_weights, opciones.ejemplos_por_paso)
+    if agrupar:
+        informe_padding(sampler.primera_epoca(), lens, config["batch_size"])
+
+    # Argumentos de entrenamiento
+    args = TrainingArguments(
+        output_dir=config["salida"],
+        evaluation_strategy="epoch",
+        save_strategy="epoch",
+        logging_strategy="epoch",
+        per_device_train_batch_size=config["batch_size"],
+        per_device_eval_batch_size=config["batch_size"],
+        gradient_accumulation_steps=acumulacion,
+        num_train_epochs=opciones.epocas,
+        learning_rate=2e-5,          # LR más bajo → más estable con pérdida ponderada
+        weight_decay=0.01,
+        load_best_model_at_end=True,
+        metric_for_best_model="f1",
+        save_total_limit=2,
+    )
+
+    # Entrenamiento
+    WeightedTrainer(
+        model=model,
+        args=args,
+        train_dataset=trainTok,
+        eval_dataset=testTok,
+        tokenizer=tokenizer,
+        data_collator=DataCollatorWithPadding(tokenizer),
+        preprocess_logits_for_metrics=preprocess_logits_for_metrics,
+        compute_metrics=compute_metrics,
+        class_weights=class_weights,
+        sampler=sampler,
+        ordenar_eval=agrupar,
+        max_tokens=opciones.max_tokens,
+        normalizador=normalizador,
+    ).train()
+
+    # Liberar el modelo antes de pasar al siguiente
+    del model
+    gc.collect()
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+# modelos: los que entrena por defecto (así cada script de modelo es solo main(["beto"]))
+def main(modelos=None):
+    parser = argparse.ArgumentParser(description="Entrena los clasificadores humano vs IA")
+    parser.add_argument("train", help="train.(csv|parquet)")
+    parser.add_argument("test", help="test.(csv|parquet)")
+    parser.add_argument("--modelos", nargs="+", default=modelos or ["todos"],
+                        choices=["todos", *MODELOS], help="modelos del registro a entrenar")
+    parser.add_argument("--epocas", type=int, default=6)
+    parser.add_argument("--batch-size", type=int, help="cambia el batch size del registro")
+    parser.add_argument("--max-length", type=int, help="cambia la longitud máxima del registro")
+    parser.add_argument("--num-proc", type=int, help="procesos para tokenizar si no está en caché")
+    parser.add_argument("--sin-agrupar", action="store_true", help="lotes al azar, sin agrupar por longitud")
+    parser.add_argument("--max-tokens", type=int,
+                        help="lotes de tamaño variable con hasta estos tokens (con padding), p. ej. 4096 = 8 x 512")
+    parser.add_argument("--ejemplos-por-paso", type=int, default=32,
+                        help="(con --max-tokens) ejemplos por paso del optimizador a los que se ajusta la acumulación")
+    parser.add_argument("--muestreo", choices=("ponderado", "estratificado"), default="ponderado",
+                        help="ponderado: sorteo con reemplazo como WeightedRandomSampler; "
+                             "estratificado: 50/50 por época sin duplicados innecesarios")
+    args = parser.parse_args()
+
+    nombres = list(MODELOS) if "todos" in args.modelos else args.modelos
+    for alias in nombres:
+        config = dict(MODELOS[alias])
+        if args.batch_size:
+            config["batch_size"] = args.batch_size
+        if args.max_length:
+            config["max_length"] = args.max_length
+        entrenar(alias, config, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Pesos de clase, pérdida ponderada y muestreo balanceado de los entrenadores.
+# Antes los pesos por ejemplo salían de una lista por comprensión con un .item()
+# por fila (lentísimo con decenas de millones de filas) y compute_loss creaba una
+# CrossEntropyLoss nueva, y copiaba los pesos al dispositivo, en cada paso:
+#   pesos_clase / pesos_muestra  un bincount y una indexación, sin bucles de Python
+#   PerdidaPonderada             la pérdida se crea y se mueve al dispositivo una vez
+#   SorteoEstratificado          épocas con las clases al 50 % sin los duplicados de
+#                                WeightedRandomSampler(replacement=True)
+#
+# Uso (microbenchmark frente al código anterior):
+#   python ponderacion.py --filas 1000000 --pasos 2000
+import argparse
+import time
+
+import numpy as np
+import torch
+from torch.nn import CrossEntropyLoss
+from torch.utils.data import Sampler
+
+
+# pesos de clase  (≈ 3 : 1): N_total / (2 * N_clase)
+def pesos_clase(labels):
+    conteos = torch.bincount(torch.as_tensor(labels, dtype=torch.long), minlength=2)
+    return (len(labels) / (2 * conteos)).to(torch.float32)
+
+
+# peso de cada ejemplo = peso de su clase, con una sola indexación
+def pesos_muestra(labels, class_weights):
+    return class_weights[torch.as_tensor(labels, dtype=torch.long)].to(torch.double)
+
+
+# CrossEntropyLoss con pesos de clase. Los pesos son un buffer del módulo, así que
+# con .to(device) se mueven una vez y no en cada paso
+class PerdidaPonderada(torch.nn.Module):
+    def __init__(self, class_weights):
+        super().__init__()
+        self.media = CrossEntropyLoss(weight=class_weights)
+        self.suma = CrossEntropyLoss(weight=class_weights, reduction="sum")
+
+    # Con normalizador (lotes de tamaño variable) la suma ponderada se divide por él;
+    # si no, la media ponderada de siempre
+    def forward(self, logits, labels, normalizador=None):
+        if normalizador:
+            return self.suma(logits, labels) / normalizador
+        return self.media(logits, labels)
+
+
+# Índices de cada época con el mismo nº de ejemplos de cada clase (en total, los del
+# conjunto). Cada clase se recorre en una permutación que sigue de una época a la
+# siguiente: de la mayoritaria no se repite ningún ejemplo hasta haberlos usado todos,
+# y la minoritaria se repite lo justo (a lo largo de las épocas todos sus ejemplos
+# salen las mismas veces, ±1), en vez de los duplicados al azar de un sorteo con reemplazo.
+class SorteoEstratificado:
+    def __init__(self, labels, generator=None):
+        labels = np.asarray(labels)
+        self.clases = [np.flatnonzero(labels == c) for c in np.unique(labels)]
+        self.por_clase = len(labels) // len(self.clases)
+        self.generator = generator
+        self.pendientes = [np.empty(0, dtype=np.int64) for _ in self.clases]
+
+    def __len__(self):
+        return self.por_clase * len(self.clases)
+
+    def __call__(self):
+        partes = []
+        for k, idx in enumerate(self.clases):
+            while len(self.pendientes[k]) < self.por_clase:
+                nueva = idx[torch.randperm(len(idx), generator=self.generator).numpy()]
+                # los que aún quedan de la permutación anterior van al final de la nueva,
+                # así la época no repite ejemplos mientras la clase tenga suficientes
+                repetidos = np.isin(nueva, self.pendientes[k])
+                self.pendientes[k] = np.concatenate([self.pendientes[k], nueva[~repetidos], nueva[repetidos]])
+            partes.append(self.pendientes[k][:self.por_clase])
+            self.pendientes[k] = self.pendientes[k][self.por_clase:]
+        indices = np.concatenate(partes)
+        return indices[torch.randperm(len(indices), generator=self.generator).numpy()]
+
+
+# Sampler con el sorteo estratificado, para cuando no se agrupa por longitud
+class SamplerEstratificado(Sampler):
+    def __init__(self, sorteo):
+        self.sorteo = sorteo
+
+    def __len__(self):
+        return len(self.sorteo)
+
+    def __iter__(self):
+        return iter(self.sorteo().tolist())
+
+
+def medir(funcion, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = funcion()
+    return (time.perf_counter() - inicio) / repeticiones, resultado
+
+
+def main():
+    from torch.utils.data import WeightedRandomSampler
+
+    parser = argparse.ArgumentParser(description="Microbenchmark de pesos, pérdida y muestreo")
+    parser.add_argument("--filas", type=int, default=1_000_000)
+    parser.add_argument("--pasos", type=int, default=2000, help="pasos de pérdida a medir")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    # ≈ 3 : 1 como el conjunto de noticias (tres generadas por cada real)
+    trainLabels = (torch.rand(args.filas) < 0.75).long()
+    class_weights = pesos_clase(trainLabels)
+    print(f"{args.filas} filas, pesos de clase {class_weights.tolist()}, dispositivo {device}")
+
+    # Pesos por ejemplo. El código anterior recorría trainDF["label"], enteros de Python
+    # (no el tensor, que haría de cada y == 0 una comparación de tensores)
+    etiquetas = trainLabels.tolist()
+    antes, viejos = medir(lambda: [class_weights[0].item() if y == 0 else class_weights[1].item() for y in etiquetas])
+    ahora, nuevos = medir(lambda: pesos_muestra(trainLabels, class_weights))
+    assert np.allclose(viejos, nuevos.numpy())
+    print(f"pesos por ejemplo:  lista {antes:8.3f} s   vectorizado {ahora:8.4f} s   x{antes / ahora:.0f}")
+
+    # Pérdida: creada en cada paso frente a creada una vez
+    logits = torch.randn(args.batch_size, 2, device=device)
+    labels = trainLabels[:args.batch_size].to(device)
+
+    def cada_paso():
+        for _ in range(args.pasos):
+            CrossEntropyLoss(weight=class_weights.to(logits.device))(logits, labels)
+
+    perdida = PerdidaPonderada(class_weights).to(device)
+
+    def una_vez():
+        for _ in range(args.pasos):
+            perdida(logits, labels)
+
+    antes, _ = medir(cada_paso)
+    ahora, _ = medir(una_vez)
+    print(f"pérdida ({args.pasos} pasos): cada paso {antes * 1e6 / args.pasos:6.1f} µs/paso   "
+          f"una vez {ahora * 1e6 / args.pasos:6.1f} µs/paso   x{antes / ahora:.1f}")
+
+    # Muestreo de una época: proporción de clases y ejemplos distintos
+    sorteo = SorteoEstratificado(trainLabels.numpy())
+    for nombre, sampler in (("WeightedRandomSampler", WeightedRandomSampler(nuevos, num_samples=len(nuevos), replacement=True)),
+                            ("SorteoEstratificado", SamplerEstratificado(sorteo))):
+        dt, indices = medir(lambda: np.fromiter(iter(sampler), dtype=np.int64))
+        ia = trainLabels.numpy()[indices].mean()
+        distintos = len(np.unique(indices)) / args.filas
+        print(f"{nombre:22} {dt:6.2f} s   clase IA {ia:.1%}   ejemplos distintos {distintos:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,7 @@ import time  # Para esperar entre reintentos
 import signal  # Para poder interrumpir el programa de manera segura (es decir hacer control c)
 import argparse  # Para argumentos por línea de comandos
 import requests  # Para hacer peticiones HTTP a la API
+from fragmentos import FRAGMENT_EXT, procesarFragmento  # Para los fragmentos .jsonl que escriben los crawlers
 
 # CClase creada para poder definir funciones que nos permitan salir de manera segura dle programa
 class GracefulExiter:
@@ -104,6 +105,16 @@ def jsonProcessor(api_key, root_dir="Noticias"):
             if exiter.should_exit:
                 break
               
+            # Los fragmentos .jsonl(.zst) de los crawlers se tratan artículo a artículo
+            if file.endswith(FRAGMENT_EXT):
+                print(f"\n Procesando fragmento: {os.path.join(root, file)}")
+                try:
+                    procesarFragmento(os.path.join(root, file), "deepseek", client.generate, keyCleaner, exiter, stats)
+                except Exception as e:
+                    print(f"\n Error: {str(e)}")
+                    stats['errores'] += 1
+                continue
+
             # Solo tratamos archivo .json  
             if not file.endswith('.json'):
                 continue
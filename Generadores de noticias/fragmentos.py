@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Lectura y escritura de los fragmentos JSONL (.jsonl / .jsonl.zst) que escribe
+# Crawlers/pipelines.py. Lo usan los tres generadores para añadir su párrafo a
+# cada artículo del fragmento igual que lo hacen con los .json sueltos.
+import io
+import json
+import os
+
+# Extensiones de los fragmentos
+FRAGMENT_EXT = ('.jsonl', '.jsonl.zst')
+
+# Lee todos los artículos de un fragmento
+def leerFragmento(filePath):
+    with open(filePath, 'rb') as raw:
+        if filePath.endswith('.zst'):
+            import zstandard  # solo hace falta para fragmentos comprimidos
+            raw = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        return [json.loads(line) for line in io.TextIOWrapper(raw, encoding='utf-8', errors='replace') if line.strip()]
+
+# Reescribe el fragmento completo en un temporal y lo sustituye de golpe,
+# así un corte a mitad de escritura nunca deja el fragmento a medias
+def escribirFragmento(filePath, articulos):
+    datos = ''.join(json.dumps(a, ensure_ascii=False) + '\n' for a in articulos).encode('utf-8')
+    if filePath.endswith('.zst'):
+        import zstandard
+        datos = zstandard.ZstdCompressor(level=3).compress(datos)
+    tmpPath = filePath + '.tmp'
+    with open(tmpPath, 'wb') as f:
+        f.write(datos)
+    os.replace(tmpPath, filePath)
+
+# Genera el párrafo de 'clave' para cada artículo del fragmento que aún no lo tenga.
+# generar(title, content) devuelve el texto o None; el fragmento se guarda cada 'cada' artículos generados
+def procesarFragmento(filePath, clave, generar, keyCleaner, exiter, stats, cada=20):
+    articulos = leerFragmento(filePath)
+    pendientes = 0
+
+    for data in articulos:
+        if exiter.should_exit:
+            break
+
+        dataCleaned = keyCleaner(data)
+        if 'title' not in dataCleaned or 'content' not in dataCleaned:
+            print(f"Error: Claves faltantes. Detectadas {list(data.keys())}")
+            stats['errores'] += 1
+            continue
+
+        if clave in data:
+            stats['existentes'] += 1
+            continue
+
+        try:
+            generated = generar(dataCleaned['title'], dataCleaned['content'])
+        except Exception as e:
+            print(f"Error:\n{e}")
+            generated = None
+
+        if not generated:
+            print("Error: Fallo en la generación")
+            stats['errores'] += 1
+            continue
+
+        data[clave] = generated.strip()
+        stats['procesados'] += 1
+        pendientes += 1
+        print(f"El párrafo ha sido generado exitosamente ({data.get('id', data.get('url', ''))})")
+
+        if pendientes >= cada:
+            escribirFragmento(filePath, articulos)
+            pendientes = 0
+
+    if pendientes:
+        escribirFragmento(filePath, articulos)
@@ -6,6 +6,7 @@ import signal
 import argparse
 from transformers import AutoTokenizer, AutoModelForCausalLM
 import torch
+from fragmentos import FRAGMENT_EXT, procesarFragmento
 
 class GracefulExiter:
     def __init__(self):
@@ -73,6 +74,16 @@ def jsonProcessor(root_dir="Noticias"):
             if exiter.should_exit:
                 break
             
+            # Fragmentos .jsonl(.zst) de los crawlers: un artículo por línea
+            if file.endswith(FRAGMENT_EXT):
+                print(f"\nProcesando fragmento: {os.path.join(root, file)}")
+                try:
+                    procesarFragmento(os.path.join(root, file), "gemma", client.generate, keyCleaner, exiter, stats)
+                except Exception as e:
+                    print(f"Error: {str(e)}")
+                    stats['errores'] += 1
+                continue
+
             if not file.endswith('.json'):
                 continue
 
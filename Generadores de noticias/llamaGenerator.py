@@ -6,6 +6,7 @@ import signal  # Importa el módulo signal para manejar señales del sistema (SI
 import argparse  # Importa el módulo argparse para parsear argumentos de línea de comandos
 from transformers import AutoTokenizer, AutoModelForCausalLM  # Importa clases de Hugging Face Transformers para tokenización y modelo causal
 import torch  # Importa PyTorch para manejo de tensores y configuración del modelo
+from fragmentos import FRAGMENT_EXT, procesarFragmento  # Lectura/escritura de los fragmentos .jsonl de los crawlers
 
 class GracefulExiter:
     def __init__(self):  # Constructor de la clase
@@ -71,6 +72,16 @@ def jsonProcessor(root_dir="Noticias"):
             if exiter.should_exit:
                 break
             
+            # Fragmentos .jsonl(.zst) de los crawlers: un artículo por línea
+            if file.endswith(FRAGMENT_EXT):
+                print(f"\nProcesando fragmento: {os.path.join(root, file)}")
+                try:
+                    procesarFragmento(os.path.join(root, file), "llama", client.generate, keyCleaner, exiter, stats)
+                except Exception as e:  # Fragmento ilegible o error al reescribirlo
+                    print(f"Error: {str(e)}")
+                    stats['errores'] += 1
+                continue
+
             # Omite archivos que no terminen en .json
             if not file.endswith('.json'):  
                 continue
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Barrido de hiperparámetros del baseline (CountVectorizer + LogisticRegression).
+#
+# El texto se tokeniza una sola vez por cada combinación de ngram_range y stop_words:
+# se construye la matriz con el vocabulario completo (min_df=1, sin max_features),
+# se guarda en caché (caracteristicas.py) y en .npy sin comprimir, y cada
+# configuración de min_df/max_features es solo una selección de columnas de esa
+# matriz, con el mismo criterio que usa CountVectorizer. Los procesos del pool
+# abren las matrices con memory-map, así que no se copian ni se vuelve a tokenizar.
+#
+# Al final se imprime una tabla ordenada por F1 (y por tiempo de entrenamiento).
+#
+# Uso:
+#   python barridoBaseline.py train.csv test.csv
+#   python barridoBaseline.py train.csv test.csv --ngram-max 1 2 --stop-words no si \
+#       --min-df 1 5 0.05 --max-features 50000 0 --C 0.1 1 10 --penalty l2 l1 -j 8 --salida barrido.csv
+import argparse
+import concurrent.futures
+import csv
+import itertools
+import os
+import sys
+import time
+
+import numpy as np
+from sklearn.feature_extraction.text import CountVectorizer
+from sklearn.metrics import accuracy_score, f1_score
+
+from baseline import cargar, crear_clasificador, min_df_tipo, spanishSW
+from caracteristicas import (CACHE_DIR, ajustar_con_cache, transformar_con_cache, huella,
+                             huella_fichero, guardar_mmap, cargar_mmap)
+
+COLUMNAS_TABLA = ["ngram_max", "stop_words", "min_df", "max_features", "C", "penalty",
+                  "vocabulario", "f1", "accuracy", "fit_s", "predict_s"]
+
+
+# Vectorizador con el vocabulario completo para un ngram_range y unas stop words
+def vectorizador_completo(ngram_max, stop_words):
+    return CountVectorizer(
+        input="content",
+        lowercase=True,
+        stop_words=spanishSW if stop_words else None,
+        ngram_range=(1, ngram_max),
+        max_df=1.0,
+        min_df=1,
+        max_features=None,
+    )
+
+
+# Tokeniza train y test (o los carga de la caché) y deja las matrices listas para memory-map.
+# Devuelve (directorio train, directorio test, frecuencias de documento, frecuencias totales)
+def preparar_matrices(trainPath, testPath, ngram_max, stop_words, cache_dir):
+    vectorizer, X_train, yTrain, clave = ajustar_con_cache(
+        vectorizador_completo(ngram_max, stop_words), trainPath, lambda path: cargar(path, "train"), cache_dir)
+    X_test, yTest = transformar_con_cache(
+        vectorizer, clave, testPath, lambda path: cargar(path, "val"), cache_dir)
+    dir_train = guardar_mmap(os.path.join(cache_dir, f"{clave}.mmap"), X_train, yTrain)
+    dir_test = guardar_mmap(os.path.join(cache_dir, f"{huella(clave, huella_fichero(testPath))}.mmap"), X_test, yTest)
+    X_train = X_train.tocsc()
+    dfs = np.diff(X_train.indptr)              # nº de documentos con cada término
+    tfs = np.asarray(X_train.sum(axis=0)).ravel()  # nº de apariciones de cada término
+    return dir_train, dir_test, dfs, tfs
+
+
+# Columnas que conservaría CountVectorizer(min_df, max_features) (mismo criterio que _limit_features)
+def columnas(dfs, tfs, n_docs, min_df, max_features):
+    minimo = min_df * n_docs if isinstance(min_df, float) else min_df
+    mascara = dfs >= minimo
+    if max_features and mascara.sum() > max_features:
+        elegidos = (-tfs[mascara]).argsort()[:max_features]
+        nueva = np.zeros(len(dfs), dtype=bool)
+        nueva[np.where(mascara)[0][elegidos]] = True
+        mascara = nueva
+    return np.flatnonzero(mascara)
+
+
+# Matrices abiertas en cada proceso (se reutilizan entre configuraciones)
+_matrices = {}
+
+
+def abrir(directorio):
+    if directorio not in _matrices:
+        _matrices[directorio] = cargar_mmap(directorio)
+    return _matrices[directorio]
+
+
+# Entrena y evalúa una configuración; se ejecuta en los procesos del pool
+def evaluar(dir_train, dir_test, cols, C, penalty):
+    X_train, yTrain = abrir(dir_train)
+    X_test, yTest = abrir(dir_test)
+    X_train, X_test = X_train[:, cols], X_test[:, cols]
+
+    classifier = crear_clasificador(C, penalty)
+    inicio = time.perf_counter()
+    classifier.fit(X_train, yTrain)
+    fit_s = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    y_pred = classifier.predict(X_test)
+    predict_s = time.perf_counter() - inicio
+
+    return f1_score(yTest, y_pred, average="macro"), accuracy_score(yTest, y_pred), fit_s, predict_s
+
+
+def imprimir_tabla(filas):
+    anchos = [max(len(c), *(len(str(f[c])) for f in filas)) for c in COLUMNAS_TABLA]
+    print("  ".join(c.ljust(a) for c, a in zip(COLUMNAS_TABLA, anchos)))
+    for f in filas:
+        print("  ".join(str(f[c]).ljust(a) for c, a in zip(COLUMNAS_TABLA, anchos)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Barrido de hiperparámetros del baseline")
+    parser.add_argument("train", help="train.csv (también .parquet, .zip, .gz o .zst)")
+    parser.add_argument("test", help="test.csv (también .parquet, .zip, .gz o .zst)")
+    parser.add_argument("--ngram-max", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--stop-words", choices=("no", "si"), nargs="+", default=["no", "si"])
+    parser.add_argument("--min-df", type=min_df_tipo, nargs="+", default=[1, 5, 0.05],
+                        help="entero = nº de documentos, con punto = proporción")
+    parser.add_argument("--max-features", type=int, nargs="+", default=[50000, 0], help="0 = sin límite")
+    parser.add_argument("--C", type=float, nargs="+", default=[0.1, 1.0, 10.0])
+    parser.add_argument("--penalty", choices=("l1", "l2"), nargs="+", default=["l2"])
+    parser.add_argument("--cache", default=CACHE_DIR, help="carpeta de la caché de matrices")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="procesos que entrenan")
+    parser.add_argument("--salida", help="guardar también la tabla en este CSV")
+    args = parser.parse_args()
+
+    # Una tokenización por cada (ngram_max, stop_words); el resto de la rejilla son tareas del pool
+    tareas = []
+    for ngram_max, stop_words in itertools.product(args.ngram_max, args.stop_words):
+        inicio = time.perf_counter()
+        dir_train, dir_test, dfs, tfs = preparar_matrices(args.train, args.test, ngram_max,
+                                                          stop_words == "si", args.cache)
+        print(f"Matrices ngram_max={ngram_max} stop_words={stop_words}: {len(dfs)} términos "
+              f"({time.perf_counter() - inicio:.1f}s)", file=sys.stderr)
+        n_docs = np.load(os.path.join(dir_train, "shape.npy"))[0]
+        for min_df, max_features in itertools.product(args.min_df, args.max_features):
+            cols = columnas(dfs, tfs, n_docs, min_df, max_features)
+            for C, penalty in itertools.product(args.C, args.penalty):
+                config = {"ngram_max": ngram_max, "stop_words": stop_words, "min_df": min_df,
+                          "max_features": max_features or "-", "C": C, "penalty": penalty,
+                          "vocabulario": len(cols)}
+                tareas.append((config, (dir_train, dir_test, cols, C, penalty)))
+
+    print(f"{len(tareas)} configuraciones con {args.jobs} procesos", file=sys.stderr)
+    filas = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futuros = {pool.submit(evaluar, *argumentos): config for config, argumentos in tareas}
+        for futuro in concurrent.futures.as_completed(futuros):
+            f1, acc, fit_s, predict_s = futuro.result()
+            filas.append({**futuros[futuro], "f1": round(f1, 4), "accuracy": round(acc, 4),
+                          "fit_s": round(fit_s, 3), "predict_s": round(predict_s, 3)})
+
+    # Mejor F1 primero; a igualdad, el que entrena más rápido
+    filas.sort(key=lambda f: (-f["f1"], f["fit_s"]))
+    imprimir_tabla(filas)
+
+    if args.salida:
+        with open(args.salida, "w", newline="", encoding="utf-8") as out:
+            writer = csv.DictWriter(out, fieldnames=COLUMNAS_TABLA)
+            writer.writeheader()
+            writer.writerows(filas)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,82 +3,218 @@
 
 
 # BASELINE basado en https://realpython.com/python-keras-text-classification/#defining-a-baseline-model
+#
+# Dos modos:
+#   bow     (por defecto) CountVectorizer + LogisticRegression con todo el train en memoria
+#   hashing HashingVectorizer + SGDClassifier.partial_fit leyendo el train por bloques:
+#           no hay vocabulario que construir ni matriz completa en memoria, los bloques
+#           se vectorizan en paralelo (-j) y el clasificador aprende bloque a bloque,
+#           así que vale para decenas de millones de filas en una máquina con CPU.
+#
+# En modo bow las matrices de train y test se guardan en caché (caracteristicas.py):
+# si no cambian los datos ni los parámetros del vectorizador, la siguiente ejecución
+# solo entrena el clasificador (útil para probar --C, --penalty...). Para probar
+# muchas combinaciones de una vez está barridoBaseline.py.
+#
+# En modo bow el modelo se guarda además en formato compacto (modeloBaseline/),
+# que puntuadorBaseline.py carga en milisegundos y usa sin sklearn.
+#
+# Uso:
+#   python baseline.py train.csv test.csv
+#   python baseline.py train.csv test.csv --C 0.1 --penalty l1   # reutiliza las matrices
+#   python baseline.py train.parquet test.parquet --modo hashing --epocas 3 -j 8
+import argparse
+import collections
+import concurrent.futures
+import os
 import sys
 import joblib
-import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
-from sklearn.linear_model import LogisticRegression
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer
+from sklearn.linear_model import LogisticRegression, SGDClassifier
 from sklearn.metrics import accuracy_score, f1_score
 
 from stop_words import get_stop_words
+from datos import leer_textos, leer_lotes
+from caracteristicas import CACHE_DIR, ajustar_con_cache, transformar_con_cache
+from puntuadorBaseline import MODELO_DIR, exportar
 
 # lista de strings
 spanishSW = get_stop_words("spanish")
 
-# Comprobar argumentos de entrada
-if len(sys.argv) != 3:
-    sys.exit("Uso: python baseline.py <train.csv> <test.csv>")
+# Ficheros donde se guarda el modelo (los lee clasificationReport.py)
+VECT_PATH = "baselineVectorizer.joblib"
+CLF_PATH  = "baselineClassifier.joblib"
 
-trainPath, testPath = sys.argv[1], sys.argv[2]
+# Bloques en vuelo por proceso al vectorizar en paralelo
+EN_VUELO_POR_PROCESO = 2
 
-# Cargar datos con pandas
-trainDF = pd.read_csv(trainPath)
-testDF  = pd.read_csv(testPath)
 
-# Verificar que existen las columnas necesarias
-for df, name in [(trainDF, "train"), (testDF, "val")]:
-    if not {"text", "label"}.issubset(df.columns):
+# Cargar textos y etiquetas (solo esas dos columnas; los comprimidos se leen sin extraerlos)
+# y verificar que existen las columnas necesarias
+def cargar(path, name):
+    try:
+        # lista de strings y lista de 0/1
+        return leer_textos(path)
+    except (KeyError, ValueError):
         sys.exit(f"Error: el archivo {name}.csv debe tener columnas 'text' y 'label'")
 
-# Extraer arrays de texto y etiquetas
-# array de strings
-sentencesTrain = trainDF["text"].values
-# array de 0/1
-yTrain = trainDF["label"].values
 
-sentencesTest = testDF["text"].values
-yTest = testDF["label"].values
+# Bloques (textos, etiquetas) de un fichero sin cargarlo entero
+def bloques(path, filas):
+    try:
+        for lote in leer_lotes(path, tam=filas, columnas=["text", "label"]):
+            yield ["" if t is None else t for t in lote.column("text").to_pylist()], lote.column("label").to_pylist()
+    except (KeyError, ValueError):
+        sys.exit(f"Error: el archivo {path} debe tener columnas 'text' y 'label'")
 
-# Vectorización Bag-of-Words
-# Creamos el vectorizador con parámetros por defecto
-vectorizer = CountVectorizer(
-    input="content",
-    lowercase=True, # Para normalizar todo a minusculas y esta bien para palabras tipo ONG y ong
-    stop_words=None,  # stop_words="spanishSW": usa la lista de palabras vacías de la biblioteca stop words para español. Aunque el profesor ha dicho de momento dejarlo asi, si eso luego probarlo con eso
-    ngram_range=(1, 1), #(1,1) solo cuenta palabras, (2,2) cuenta bigramas, profesor: yo lo dejaria por defecto (1,1)
-    max_df=1.0, # 0.8 descarta términos que aparecen en más del 80 % de los documentos (muy genéricos).Profesor: este valor no se suele cambiar se suele dejar al 100%
-    min_df=0.05, #descarta términos que aparecen en menos de 5 documentos (ruido). Profesor: 5% es buen procentaje ya que tienes muchas noticias
-    max_features=50000, #construye un vocabulario de tamaño fijo. Esto ponlo segun tengas problemas de memoria.  
-)
 
+# "5" es un número de documentos y "0.05" una proporción, como en CountVectorizer
+def min_df_tipo(valor):
+    return float(valor) if "." in valor else int(valor)
 
-# Se aprende el vocabulario SOLO del train
-vectorizer.fit(sentencesTrain)
 
-# Transformamos train y test a matrices dispersas
-X_train = vectorizer.transform(sentencesTrain)
-X_test  = vectorizer.transform(sentencesTest)
-
-# Entrenar Regresión Logística
+# Regresión logística para --penalty: sklearn 1.8 deja obsoleto el argumento penalty,
+# así que l1 es l1_ratio=1.0 (con liblinear) y l2 el l1_ratio=0 por defecto (con lbfgs).
 # max_iter alto para asegurar convergencia
-classifier = LogisticRegression(max_iter=10000)
-classifier.fit(X_train, yTrain)
-
-# Guardar a disco vectorizer y clasificador
-vect_path = "baselineVectorizer.joblib"
-clf_path  = "baselineClassifier.joblib"
-joblib.dump(vectorizer, vect_path)
-joblib.dump(classifier,  clf_path)
-
-# Evaluación sobre el conjunto de validación
-y_pred = classifier.predict(X_test)
-
-# Métricas
-acc = accuracy_score(yTest, y_pred)
-f1  = f1_score(yTest, y_pred, average="macro")
-
-print("=== Baseline: Bag-of-Words + LogisticRegression ===")
-print(f"Nº ejemplos train: {len(yTrain)}, vocabulario: {len(vectorizer.vocabulary_)}")
-print(f"Nº ejemplos test : {len(yTest)}")
-print(f"Accuracy (test): {acc:.4f}")
-print(f"F1 macro   (test): {f1:.4f}")
+def crear_clasificador(C, penalty):
+    if penalty == "l1":
+        return LogisticRegression(C=C, l1_ratio=1.0, solver="liblinear", max_iter=10000)
+    return LogisticRegression(C=C, solver="lbfgs", max_iter=10000)
+
+
+def crear_hashing_vectorizer(n_features):
+    return HashingVectorizer(
+        lowercase=True,
+        ngram_range=(1, 1),
+        n_features=n_features,   # sin vocabulario: cada palabra va a la columna de su hash
+        alternate_sign=False,
+        norm="l2",
+    )
+
+
+# Bloques vectorizados (X, y) en el mismo orden que los de entrada, con como mucho unos pocos en vuelo
+def vectorizar_bloques(vectorizer, fuente, jobs):
+    if jobs <= 1:
+        for texts, y in fuente:
+            yield vectorizer.transform(texts), y
+        return
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        pendientes = collections.deque()
+        for texts, y in fuente:
+            pendientes.append((pool.submit(vectorizer.transform, texts), y))
+            if len(pendientes) >= jobs * EN_VUELO_POR_PROCESO:
+                futuro, y_bloque = pendientes.popleft()
+                yield futuro.result(), y_bloque
+        while pendientes:
+            futuro, y_bloque = pendientes.popleft()
+            yield futuro.result(), y_bloque
+
+
+# Modo bow: CountVectorizer + LogisticRegression en memoria
+def entrenar_bow(trainPath, testPath, args):
+    # Vectorización Bag-of-Words
+    # Creamos el vectorizador con parámetros por defecto
+    vectorizer = CountVectorizer(
+        input="content",
+        lowercase=True, # Para normalizar todo a minusculas y esta bien para palabras tipo ONG y ong
+        stop_words=None,  # stop_words="spanishSW": usa la lista de palabras vacías de la biblioteca stop words para español. Aunque el profesor ha dicho de momento dejarlo asi, si eso luego probarlo con eso
+        ngram_range=(1, args.ngram_max), #(1,1) solo cuenta palabras, (2,2) cuenta bigramas, profesor: yo lo dejaria por defecto (1,1)
+        max_df=1.0, # 0.8 descarta términos que aparecen en más del 80 % de los documentos (muy genéricos).Profesor: este valor no se suele cambiar se suele dejar al 100%
+        min_df=args.min_df, # 0.05 descarta términos que aparecen en menos de 5 documentos (ruido). Profesor: 5% es buen procentaje ya que tienes muchas noticias
+        max_features=50000, #construye un vocabulario de tamaño fijo. Esto ponlo segun tengas problemas de memoria.
+    )
+
+    if args.sin_cache:
+        sentencesTrain, yTrain = cargar(trainPath, "train")
+        sentencesTest, yTest = cargar(testPath, "val")
+
+        # Se aprende el vocabulario SOLO del train
+        # Transformamos train y test a matrices dispersas
+        X_train = vectorizer.fit_transform(sentencesTrain)
+        X_test  = vectorizer.transform(sentencesTest)
+    else:
+        # Lo mismo, pero cargando de la caché las matrices que ya se calcularon
+        vectorizer, X_train, yTrain, clave = ajustar_con_cache(
+            vectorizer, trainPath, lambda path: cargar(path, "train"), args.cache)
+        X_test, yTest = transformar_con_cache(
+            vectorizer, clave, testPath, lambda path: cargar(path, "val"), args.cache)
+
+    # Entrenar Regresión Logística
+    classifier = crear_clasificador(args.C, args.penalty)
+    classifier.fit(X_train, yTrain)
+
+    # Evaluación sobre el conjunto de validación
+    y_pred = classifier.predict(X_test)
+
+    print("=== Baseline: Bag-of-Words + LogisticRegression ===")
+    print(f"Nº ejemplos train: {len(yTrain)}, vocabulario: {len(vectorizer.vocabulary_)}")
+    return vectorizer, classifier, yTest, y_pred
+
+
+# Modo hashing: HashingVectorizer + SGDClassifier.partial_fit por bloques
+def entrenar_hashing(trainPath, testPath, args):
+    vectorizer = crear_hashing_vectorizer(args.n_features)
+    # loss="log_loss" es una regresión logística, entrenada por descenso de gradiente
+    classifier = SGDClassifier(loss="log_loss", alpha=args.alpha, random_state=42)
+
+    n_train = 0
+    for epoca in range(args.epocas):
+        n_train = 0
+        for X, y in vectorizar_bloques(vectorizer, bloques(trainPath, args.bloque), args.jobs):
+            classifier.partial_fit(X, y, classes=[0, 1])
+            n_train += len(y)
+        print(f"  época {epoca + 1}/{args.epocas}: {n_train} ejemplos", file=sys.stderr)
+
+    # Evaluación también por bloques
+    yTest, y_pred = [], []
+    for X, y in vectorizar_bloques(vectorizer, bloques(testPath, args.bloque), args.jobs):
+        yTest.extend(y)
+        y_pred.extend(classifier.predict(X).tolist())
+
+    print("=== Baseline: Hashing + SGDClassifier (partial_fit) ===")
+    print(f"Nº ejemplos train: {n_train}, columnas hash: {args.n_features}")
+    return vectorizer, classifier, yTest, y_pred
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Baseline Bag-of-Words para humano vs IA")
+    parser.add_argument("train", help="train.csv (también .parquet, .zip, .gz o .zst)")
+    parser.add_argument("test", help="test.csv (también .parquet, .zip, .gz o .zst)")
+    parser.add_argument("--modo", choices=("bow", "hashing"), default="bow")
+    parser.add_argument("--C", type=float, default=1.0, help="(bow) inversa de la regularización")
+    parser.add_argument("--penalty", choices=("l1", "l2"), default="l2", help="(bow) tipo de regularización")
+    parser.add_argument("--ngram-max", type=int, default=1, help="(bow) n-gramas de 1 a N palabras")
+    parser.add_argument("--min-df", type=min_df_tipo, default=0.05,
+                        help="(bow) frecuencia mínima de documento (entero = nº de documentos, con punto = proporción)")
+    parser.add_argument("--cache", default=CACHE_DIR, help="(bow) carpeta de la caché de matrices")
+    parser.add_argument("--sin-cache", action="store_true", help="(bow) no leer ni escribir la caché")
+    parser.add_argument("--bloque", type=int, default=50000, help="(hashing) filas por bloque")
+    parser.add_argument("--epocas", type=int, default=1, help="(hashing) pasadas sobre el train")
+    parser.add_argument("--n-features", type=int, default=2 ** 20, help="(hashing) columnas del HashingVectorizer")
+    parser.add_argument("--alpha", type=float, default=1e-6, help="(hashing) regularización del SGDClassifier")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1, help="(hashing) procesos que vectorizan")
+    args = parser.parse_args()
+
+    if args.modo == "hashing":
+        vectorizer, classifier, yTest, y_pred = entrenar_hashing(args.train, args.test, args)
+    else:
+        vectorizer, classifier, yTest, y_pred = entrenar_bow(args.train, args.test, args)
+
+    # Guardar a disco vectorizer y clasificador
+    joblib.dump(vectorizer, VECT_PATH)
+    joblib.dump(classifier, CLF_PATH)
+    # y en modo bow también el formato compacto para puntuadorBaseline.py
+    if args.modo == "bow":
+        exportar(vectorizer, classifier, MODELO_DIR)
+
+    # Métricas
+    acc = accuracy_score(yTest, y_pred)
+    f1  = f1_score(yTest, y_pred, average="macro")
+
+    print(f"Nº ejemplos test : {len(yTest)}")
+    print(f"Accuracy (test): {acc:.4f}")
+    print(f"F1 macro   (test): {f1:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Caché de matrices de características del baseline.
+# Tokenizar y vectorizar el texto es lo más lento del baseline, y se repetía en
+# cada ejecución de baseline.py y otra vez en clasificationReport.py. Aquí las
+# matrices dispersas se guardan en .npz comprimidos (y las etiquetas en .npy)
+# con un nombre que es el hash del contenido del fichero de datos más los
+# parámetros del vectorizador: mientras no cambie ninguno se cargan de disco y
+# se pueden probar clasificadores (C, penalty...) sin volver a tocar el texto.
+import hashlib
+import json
+import os
+
+import joblib
+import numpy as np
+import scipy.sparse
+
+CACHE_DIR = "cacheCaracteristicas"
+
+
+# Hash del contenido de un fichero
+def huella_fichero(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+# Hash de cualquier combinación de valores (parámetros, otras huellas...)
+def huella(*partes):
+    return hashlib.blake2b(json.dumps(partes, sort_keys=True, default=repr).encode("utf-8"),
+                           digest_size=16).hexdigest()
+
+
+# Parámetros del vectorizador que cambian la matriz (get_params de sklearn)
+def parametros(vectorizer):
+    return {"clase": type(vectorizer).__name__, **vectorizer.get_params()}
+
+
+def cargar_matriz(cache_dir, clave):
+    x_path = os.path.join(cache_dir, f"{clave}.npz")
+    y_path = os.path.join(cache_dir, f"{clave}.y.npy")
+    if not (os.path.exists(x_path) and os.path.exists(y_path)):
+        return None
+    return scipy.sparse.load_npz(x_path), np.load(y_path)
+
+
+def guardar_matriz(cache_dir, clave, X, y):
+    os.makedirs(cache_dir, exist_ok=True)
+    np.save(os.path.join(cache_dir, f"{clave}.y.npy"), np.asarray(y, dtype=np.int8))
+    # Primero a un temporal: si se corta a medias no queda un .npz roto con el nombre bueno
+    tmp = os.path.join(cache_dir, f"{clave}.tmp.npz")
+    scipy.sparse.save_npz(tmp, scipy.sparse.csr_matrix(X), compressed=True)
+    os.replace(tmp, os.path.join(cache_dir, f"{clave}.npz"))
+
+
+# X, y de un fichero transformado con un vectorizador ya ajustado.
+# clave_vectorizer identifica al vectorizador (sus parámetros y con qué se ajustó);
+# cargar(path) devuelve (textos, etiquetas) y solo se llama si no está en caché.
+def transformar_con_cache(vectorizer, clave_vectorizer, path, cargar, cache_dir=CACHE_DIR):
+    clave = huella(clave_vectorizer, huella_fichero(path))
+    guardada = cargar_matriz(cache_dir, clave)
+    if guardada is not None:
+        return guardada
+    texts, y = cargar(path)
+    X = vectorizer.transform(texts)
+    guardar_matriz(cache_dir, clave, X, y)
+    return X, np.asarray(y)
+
+
+# Ajusta el vectorizador en train y devuelve (vectorizer, X_train, y_train, clave),
+# cargando el vectorizador ajustado y la matriz de la caché si ya se hizo antes
+def ajustar_con_cache(vectorizer, trainPath, cargar, cache_dir=CACHE_DIR):
+    clave = huella(parametros(vectorizer), huella_fichero(trainPath))
+    vect_path = os.path.join(cache_dir, f"{clave}.vectorizer.joblib")
+    guardada = cargar_matriz(cache_dir, clave)
+    if guardada is not None and os.path.exists(vect_path):
+        return (joblib.load(vect_path), *guardada, clave)
+    texts, y = cargar(trainPath)
+    # fit_transform tokeniza una sola vez (fit y luego transform lo hacía dos veces)
+    X = vectorizer.fit_transform(texts)
+    guardar_matriz(cache_dir, clave, X, y)
+    joblib.dump(vectorizer, vect_path)
+    return vectorizer, X, np.asarray(y), clave
+
+
+# Matriz en .npy sin comprimir (data, indices, indptr) dentro de un directorio, para que
+# varios procesos la abran con memory-map y compartan las páginas en vez de copiarla
+def guardar_mmap(directorio, X, y):
+    if os.path.exists(os.path.join(directorio, "shape.npy")):
+        return directorio
+    os.makedirs(directorio, exist_ok=True)
+    X = scipy.sparse.csr_matrix(X)
+    for nombre in ("data", "indices", "indptr"):
+        np.save(os.path.join(directorio, f"{nombre}.npy"), getattr(X, nombre))
+    np.save(os.path.join(directorio, "y.npy"), np.asarray(y, dtype=np.int8))
+    # shape.npy se escribe el último: si existe, el directorio está completo
+    np.save(os.path.join(directorio, "shape.npy"), np.asarray(X.shape))
+    return directorio
+
+
+def cargar_mmap(directorio):
+    data, indices, indptr = (np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode="r")
+                             for nombre in ("data", "indices", "indptr"))
+    shape = tuple(int(n) for n in np.load(os.path.join(directorio, "shape.npy")))
+    X = scipy.sparse.csr_matrix((data, indices, indptr), shape=shape, copy=False)
+    return X, np.load(os.path.join(directorio, "y.npy"))
@@ -7,13 +7,19 @@
 from sklearn.metrics import confusion_matrix, ConfusionMatrixDisplay
 import matplotlib.pyplot as plt
 import argparse
+import os
 import sys
 import time
 import joblib
-import pandas as pd
+import numpy as np
 import torch
 from sklearn.metrics import classification_report
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from datos import leer_textos
+from caracteristicas import huella_fichero, transformar_con_cache
+from puntuadorBaseline import MODELO_DIR, PuntuadorBaseline
+from tokenizacion import tokenizar_con_cache
+from lotes import SamplerPorLongitud, eficiencia_padding, longitudes, lotes_de
 
 # Nuestra lista de modelos
 MODEL_DIRS = {
@@ -29,13 +35,14 @@ MODEL_DIRS = {
 
 
 
-# Realiza la inferencia de un modelo dado sobre una lista de textos.
+# Realiza la inferencia de un modelo dado sobre el conjunto de test.
 #  model_dir: ruta al directorio del checkpoint.
-#  texts: lista de cadenas de entrada.
+#  path: fichero de test; se tokeniza una vez y se guarda en caché (tokenizacion.py),
+#        la misma que usa el entrenamiento si el tokenizador y max_length coinciden.
 #  device: 'cuda' o 'cpu'. Para asi ejecutarlo en mi ordenado o no
 #  batch_size: número de ejemplos procesados por paso.
 #  Devuelve una lista de predicciones (0 o 1).
-def inferir(model_dir: str, texts: list, device: str, batch_size: int = 32) -> list:
+def inferir(model_dir: str, path: str, device: str, batch_size: int = 32) -> list:
     # Cargar el tokenizer y el modelo entrenado desde el checkpoint
     tokenizer = AutoTokenizer.from_pretrained(model_dir)
     model = AutoModelForSequenceClassification.from_pretrained(model_dir)
@@ -43,25 +50,30 @@ def inferir(model_dir: str, texts: list, device: str, batch_size: int = 32) -> l
     model.to(device)
     model.eval()
 
-    all_preds = []  # Aquí almacenaremos las predicciones finales
-
     raw_max = getattr(tokenizer, "model_max_length", None)
     # si el tokenizador no lo define o lo define como un número irreal,
     # forzamos un límite de 512
     max_len = raw_max if (isinstance(raw_max, int) and 1 <= raw_max <= 4096) else 512
-    
+
+    # Textos ya tokenizados y truncados a max_len (solo se tokeniza si no está en caché)
+    encoded = tokenizar_con_cache(path, tokenizer, max_len)
+    columnas = [c for c in encoded.column_names if c != "label"]
+
+    # Los batches se hacen de textos de longitud parecida (de más largo a más corto)
+    # para no calcular sobre padding; luego se devuelven las predicciones en el orden original
+    lens = longitudes(encoded)
+    orden = SamplerPorLongitud(lens).orden()
+    lotes = lotes_de(orden, batch_size)
+    print(f"Eficiencia de padding: {eficiencia_padding(lens, lotes):.1%} "
+          f"(en el orden del CSV: {eficiencia_padding(lens, lotes_de(np.arange(len(lens)), batch_size)):.1%})")
+    all_preds = np.empty(len(encoded), dtype=np.int64)
+
     # Procesar los textos en batches para eficiencia
-    for start in range(0, len(texts), batch_size):
-        batch = texts[start : start + batch_size]
-
-        # Tokenizar y convertir a tensores PyTorch
-        enc = tokenizer(
-            batch,
-            padding=True,        # añade padding para igualar longitudes
-            truncation=True,     # trunca textos largos a max_length
-            max_length=max_len,
-            return_tensors="pt"  # devuelve tensores
-        )
+    for lote in lotes:
+        batch = encoded[lote.tolist()]
+
+        # Añadir padding para igualar longitudes y convertir a tensores PyTorch
+        enc = tokenizer.pad({c: batch[c] for c in columnas}, return_tensors="pt")
         
         # Mover tensores al mismo dispositivo que el modelo
         enc = {k: v.to(device) for k, v in enc.items()}
@@ -70,18 +82,27 @@ def inferir(model_dir: str, texts: list, device: str, batch_size: int = 32) -> l
         with torch.no_grad():
             logits = model(**enc).logits
 
-        # Transformar logits a etiquetas (argmax) y añadir a la lista
-        batch_preds = torch.argmax(logits, dim=-1).cpu().tolist()
-        all_preds.extend(batch_preds)
+        # Transformar logits a etiquetas (argmax) y ponerlas en la posición original de cada texto
+        all_preds[lote] = torch.argmax(logits, dim=-1).cpu().numpy()
 
-    return all_preds
+    return all_preds.tolist()
 
-# Carga el vectorizer y el clasificador guardados con joblib,
+# Si está el modelo compacto (modeloBaseline/, que baseline.py guarda en modo bow)
+# y es del mismo entrenamiento que los .joblib, predice con PuntuadorBaseline sin
+# cargar sklearn. Si no, carga el vectorizer y el clasificador guardados con joblib,
 # transforma los texts con CountVectorizer y predice con LogisticRegression.
-def inferir_baseline(texts: list) -> list:
+# La matriz del test se guarda en caché (caracteristicas.py) con el hash del
+# vectorizer y del fichero, así que solo se tokeniza la primera vez.
+def inferir_baseline(texts: list, yTrue: list, path: str) -> list:
+    config = os.path.join(MODELO_DIR, "config.json")
+    # Un modelo compacto más viejo que el clasificador es de otro entrenamiento (p. ej. uno en modo hashing)
+    if os.path.exists(config) and (not os.path.exists("baselineClassifier.joblib")
+                                   or os.path.getmtime(config) >= os.path.getmtime("baselineClassifier.joblib")):
+        return PuntuadorBaseline(MODELO_DIR).predecir(texts)
+
     vec = joblib.load("baselineVectorizer.joblib")
     clf = joblib.load("baselineClassifier.joblib")
-    X = vec.transform(texts)
+    X, _ = transformar_con_cache(vec, huella_fichero("baselineVectorizer.joblib"), path, lambda _: (texts, yTrue))
     return clf.predict(X).tolist()
 
 
@@ -89,19 +110,17 @@ def inferir_baseline(texts: list) -> list:
 def main():
     parser = argparse.ArgumentParser(description="Compararador usando clasification report")
     
-    parser.add_argument("--csv", "-c", required=True, help="Ruta al CSV de test (debe tener columnas 'text','label')")
+    parser.add_argument("--csv", "-c", required=True, help="Ruta al CSV o Parquet de test (debe tener columnas 'text','label')")
     
     args = parser.parse_args()
 
-    # Cargar y validar el conjunto de prueba
-    df = pd.read_csv(args.csv)
-    if not {"text", "label"}.issubset(df.columns):
+    # Cargar el conjunto de prueba y extraer listas de textos y etiquetas verdaderas
+    # (de un Parquet solo se leen esas dos columnas)
+    try:
+        texts, yTrue = leer_textos(args.csv)
+    except (KeyError, ValueError):
         sys.exit("Error: el CSV debe contener las columnas 'text' y 'label'")
 
-    # Extraer listas de textos y etiquetas verdaderas
-    texts  = df["text"].astype(str).tolist()
-    yTrue = df["label"].astype(int).tolist()
-
     # Determinar dispositivo de inferencia
     device = "cuda" if torch.cuda.is_available() else "cpu"
     print(f"Usando dispositivo para inferencia: {device}\n")
@@ -118,7 +137,7 @@ def main():
 
         # Obtener predicciones
         t0 = time.time()
-        yPred = inferir(checkpointPath, texts, device)
+        yPred = inferir(checkpointPath, args.csv, device)
         dt = time.time() - t0
         print(f"Tiempo inferencia: {dt:.2f} s")
 
@@ -152,7 +171,7 @@ def main():
         
         
     print("\n=== Baseline Bag-of-Words + LogisticRegression ===")
-    y_pred_base = inferir_baseline(texts)
+    y_pred_base = inferir_baseline(texts, yTrue, args.csv)
     print(classification_report(
         yTrue, y_pred_base,
         target_names=["human","IA"],
@@ -1,56 +1,388 @@
 #!/usr/bin/env python3
 
 # Crea un csv con dos campos text y label recorriendo los .json
-import sys
+# y los fragmentos .jsonl / .jsonl.zst que escribe Crawlers/pipelines.py
+#
+# Los ficheros se leen en paralelo (un proceso por núcleo, -j para cambiarlo)
+# y las filas se escriben en el mismo orden que con un solo proceso.
+#
+# Con -r se recorren también las subcarpetas (<periódico>/<sección>/...).
+# Con --incremental se guarda junto al CSV un manifiesto (<salida>.manifest.json)
+# con la ruta, mtime, tamaño, hash y número de filas de cada fichero. En la
+# siguiente ejecución solo se leen los ficheros nuevos o cambiados: si solo hay
+# nuevos se añaden sus filas al final; si alguno cambió o desapareció se copia
+# el CSV quitando sus filas (sin volver a parsear el resto) y se añaden las nuevas.
+#
+# Si la salida termina en .parquet se escribe Parquet (comprimido con zstd) con
+# las columnas title, text, label, fuente (humano o el generador), sitio, seccion
+# e id del artículo, que los entrenamientos leen sin pasar por pandas (datos.py).
+import argparse
+import collections
+import concurrent.futures
+import hashlib
+import io
 import json
+import os
 import pathlib
 import csv
+import sys
+import time
+from urllib.parse import urlsplit
+
+try:
+    import orjson  # opcional: parsea bastante más rápido que json
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# Campos que NO son texto generado ("content" es la fila humana, que se escribe aparte)
+SKIP_KEYS = {"url", "date", "section", "title", "id", "duplicado_de", "content",}
+
+# Extensiones que se leen (un artículo por .json, uno por línea en los fragmentos)
+PATTERNS = ("*.json", "*.jsonl", "*.jsonl.zst")
+
+# Filas por grupo al escribir Parquet
+FILAS_POR_GRUPO = 50000
+
+# Los .json sueltos se reparten en lotes para no pagar la comunicación entre procesos por cada uno
+ARCHIVOS_POR_LOTE = 64
+# Lotes en vuelo por proceso: limita la memoria a unos pocos lotes de filas por núcleo
+EN_VUELO_POR_PROCESO = 4
+
+# Devuelve los artículos de un fichero .json, .jsonl o .jsonl.zst
+def iter_articles(path: pathlib.Path):
+    if path.suffix == ".json":
+        yield loads(path.read_bytes())
+        return
+    with path.open("rb") as raw:
+        if path.suffix == ".zst":
+            import zstandard  # solo hace falta para fragmentos comprimidos
+            raw = zstandard.ZstdDecompressor().stream_reader(raw, read_across_frames=True)
+        for line in io.BufferedReader(raw):
+            if line.strip():
+                yield loads(line)
+
+# Identificador del artículo: el que pone Crawlers/pipelines.py o, en los .json antiguos, el mismo hash de la URL
+def article_id(data):
+    if data.get("id"):
+        return data["id"]
+    url = data.get("url")
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] if url else ""
+
+# Filas (title, text, label, fuente, sitio, seccion, id) de un fichero y número de artículos leídos
+def rows_from_file(path: pathlib.Path):
+    rows = []
+    n_articles = 0
+    for data in iter_articles(path):
+        n_articles += 1
+        # Casi duplicados enlazados por Crawlers/duplicados.py: ya está el original
+        if data.get("duplicado_de"):
+            continue
+        title = data.get("title", "").strip()
+        meta = (urlsplit(data.get("url") or "").hostname or "", data.get("section") or "", article_id(data))
+        # 1) Fila humana
+        content = data.get("content", "").strip()
+        if content:
+            rows.append((title, content, 0, "humano", *meta))
+
+        # 2) Filas IA: deepseek, llama, gemma, etc.
+        for key, val in data.items():
+            if key in SKIP_KEYS:
+                continue
+            ia_text = (val or "").strip()
+            if ia_text:
+                rows.append((title, ia_text, 1, key, *meta))
+    return rows, n_articles
+
+# Hash del contenido de un fichero (para el manifiesto)
+def file_hash(path: pathlib.Path):
+    h = hashlib.blake2b(digest_size=16)
+    with path.open("rb") as f:
+        for bloque in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+# Entrada del manifiesto de un fichero (la ruta la pone quien llama, relativa a la carpeta)
+def file_entry(path: pathlib.Path, filas, articulos):
+    st = path.stat()
+    return {"mtime": st.st_mtime_ns, "size": st.st_size, "hash": file_hash(path),
+            "filas": filas, "articulos": articulos}
+
+# Filas de un lote de ficheros, en orden, número de artículos y entrada del manifiesto de cada fichero
+def rows_from_files(paths):
+    rows = []
+    n_articles = 0
+    entries = []
+    for path in paths:
+        r, n = rows_from_file(path)
+        rows.extend(r)
+        n_articles += n
+        entries.append(file_entry(path, len(r), n))
+    return rows, n_articles, entries
+
+# Lotes seguidos de ficheros: los fragmentos .jsonl (grandes) van solos
+def batches(files):
+    lote = []
+    for path in files:
+        if path.suffix != ".json":
+            if lote:
+                yield lote
+                lote = []
+            yield [path]
+            continue
+        lote.append(path)
+        if len(lote) == ARCHIVOS_POR_LOTE:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+# Resultados de rows_from_files en el orden de 'files', con como mucho 'en_vuelo' lotes pendientes
+def ordered_results(files, jobs):
+    if jobs <= 1:
+        yield from map(rows_from_files, batches(files))
+        return
+    en_vuelo = jobs * EN_VUELO_POR_PROCESO
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        pendientes = collections.deque()
+        for lote in batches(files):
+            pendientes.append(pool.submit(rows_from_files, lote))
+            if len(pendientes) >= en_vuelo:
+                yield pendientes.popleft().result()
+        while pendientes:
+            yield pendientes.popleft().result()
+
+def list_files(json_dir: pathlib.Path, recursive=False):
+    glob = json_dir.rglob if recursive else json_dir.glob
+    return sorted(f for pattern in PATTERNS for f in glob(pattern) if f.is_file())
+
+def manifest_path(out_csv: pathlib.Path):
+    return out_csv.with_name(out_csv.name + ".manifest.json")
+
+def load_manifest(out_csv: pathlib.Path):
+    path = manifest_path(out_csv)
+    if not path.exists() or not out_csv.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+def save_manifest(out_csv: pathlib.Path, manifest):
+    path = manifest_path(out_csv)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
 
-# Campos que NO son texto de entrenamiento
-SKIP_KEYS = {"url", "date", "section", "title",}
+# Separa las entradas del manifiesto que siguen valiendo de los ficheros que hay que (re)leer
+def diff_manifest(json_dir: pathlib.Path, json_files, manifest):
+    actuales = {f.relative_to(json_dir).as_posix(): f for f in json_files}
+    kept = []
+    for entry in manifest["archivos"]:
+        path = actuales.get(entry["path"])
+        if path is None:
+            continue  # borrado
+        st = path.stat()
+        if (st.st_mtime_ns, st.st_size) != (entry["mtime"], entry["size"]):
+            # Puede ser solo un touch: se compara el contenido antes de darlo por cambiado
+            if st.st_size != entry["size"] or file_hash(path) != entry["hash"]:
+                continue
+            entry = {**entry, "mtime": st.st_mtime_ns}
+        kept.append(entry)
+    conocidos = {e["path"] for e in kept}
+    pending = [f for rel, f in actuales.items() if rel not in conocidos]
+    return kept, pending
 
-def process_folder(json_dir: pathlib.Path, out_csv: pathlib.Path):
-    json_files = sorted(json_dir.glob("*.json"))
+# Salida CSV: solo las columnas title, text y label, como siempre
+class CsvOutput:
+    can_append = True
+
+    def __init__(self, path: pathlib.Path, append=False):
+        self.f = path.open("a" if append else "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.f, quoting=csv.QUOTE_MINIMAL)
+        if not append:
+            # Cabecera
+            self.writer.writerow(["title", "text", "label"])
+
+    def writerows(self, rows):
+        self.writer.writerows(row[:3] for row in rows)
+
+    # Copia las filas de las entradas que se conservan del CSV anterior (cada fichero ocupa filas seguidas)
+    def copy_kept(self, old: pathlib.Path, old_entries, kept_paths):
+        with old.open(newline="", encoding="utf-8") as f_old:
+            reader = csv.reader(f_old)
+            next(reader)  # cabecera
+            for entry in old_entries:
+                keep = entry["path"] in kept_paths
+                for _ in range(entry["filas"]):
+                    row = next(reader)
+                    if keep:
+                        self.writer.writerow(row)
+
+    def close(self):
+        self.f.close()
+
+# Salida Parquet con todas las columnas; las filas se escriben por grupos de FILAS_POR_GRUPO
+class ParquetOutput:
+    can_append = False  # un Parquet no se puede ampliar: al actualizar se reescribe copiando lo anterior
+
+    def __init__(self, path: pathlib.Path, append=False):
+        import pyarrow as pa  # solo hace falta para escribir Parquet
+        import pyarrow.parquet as pq
+        self.pa, self.pq = pa, pq
+        self.schema = pa.schema([("title", pa.string()), ("text", pa.string()), ("label", pa.int8()),
+                                 ("fuente", pa.string()), ("sitio", pa.string()),
+                                 ("seccion", pa.string()), ("id", pa.string())])
+        self.writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        self.buffer = []
+
+    def writerows(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= FILAS_POR_GRUPO:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            columnas = [self.pa.array(col, type=field.type) for col, field in zip(zip(*self.buffer), self.schema)]
+            self.writer.write_table(self.pa.Table.from_arrays(columnas, schema=self.schema))
+            self.buffer = []
+
+    # Copia los tramos de filas de las entradas que se conservan (cada fichero ocupa filas seguidas).
+    # El Parquet anterior se lee por lotes, como el CSV fila a fila, en vez de descomprimirlo
+    # entero en memoria, y solo se escriben los trozos de cada lote que caen en un tramo
+    def copy_kept(self, old: pathlib.Path, old_entries, kept_paths):
+        self.flush()
+        tramos = []  # [inicio, fin) de filas que se conservan, juntando los seguidos
+        offset = 0
+        for entry in old_entries:
+            fin = offset + entry["filas"]
+            if entry["path"] in kept_paths:
+                if tramos and tramos[-1][1] == offset:
+                    tramos[-1][1] = fin
+                else:
+                    tramos.append([offset, fin])
+            offset = fin
+
+        pendientes, n_pendientes = [], 0
+        tramos = iter(tramos)
+        tramo = next(tramos, None)
+        inicio_lote = 0
+        for lote in self.pq.ParquetFile(str(old)).iter_batches(batch_size=FILAS_POR_GRUPO):
+            if tramo is None:
+                break
+            fin_lote = inicio_lote + lote.num_rows
+            while tramo is not None and tramo[0] < fin_lote:
+                desde, hasta = max(tramo[0], inicio_lote), min(tramo[1], fin_lote)
+                pendientes.append(lote.slice(desde - inicio_lote, hasta - desde))
+                n_pendientes += hasta - desde
+                if tramo[1] > fin_lote:
+                    break  # el tramo sigue en el lote siguiente
+                tramo = next(tramos, None)
+            inicio_lote = fin_lote
+            if n_pendientes >= FILAS_POR_GRUPO:
+                self.writer.write_table(self.pa.Table.from_batches(pendientes, schema=self.schema),
+                                        row_group_size=FILAS_POR_GRUPO)
+                pendientes, n_pendientes = [], 0
+        if pendientes:
+            self.writer.write_table(self.pa.Table.from_batches(pendientes, schema=self.schema),
+                                    row_group_size=FILAS_POR_GRUPO)
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+# Clase de salida según la extensión del fichero final
+def output_class(out: pathlib.Path):
+    return ParquetOutput if out.suffix == ".parquet" else CsvOutput
+
+# Escribe las filas de 'files' y devuelve sus entradas de manifiesto y el número de artículos
+def write_files(writer, json_dir, files, jobs, progress_every):
+    t0 = time.time()
+    n_files = n_articles = n_rows = 0
+    next_progress = progress_every
+    entries = []
+    lotes = iter(files)
+    for rows, n, lote_entries in ordered_results(files, jobs):
+        writer.writerows(rows)
+        for entry in lote_entries:
+            entries.append({"path": next(lotes).relative_to(json_dir).as_posix(), **entry})
+        n_files += len(lote_entries)
+        n_articles += n
+        n_rows += len(rows)
+        if progress_every and n_files >= next_progress:
+            next_progress += progress_every
+            dt = time.time() - t0
+            print(f"  {n_files}/{len(files)} archivos, {n_articles} artículos, "
+                  f"{n_rows} filas ({n_articles / dt:.0f} artículos/s)", file=sys.stderr)
+    return entries, n_articles
+
+def process_folder(json_dir: pathlib.Path, out_csv: pathlib.Path, jobs=None, progress_every=1000,
+                   recursive=False, incremental=False):
+    json_files = list_files(json_dir, recursive)
     if not json_files:
-        print(f"No se encontraron .json en {json_dir}")
+        print(f"No se encontraron .json ni .jsonl en {json_dir}")
         return
+    jobs = jobs or os.cpu_count() or 1
+    t0 = time.time()
 
-    with out_csv.open("w", newline="", encoding="utf-8") as f_csv:
-        writer = csv.writer(f_csv, quoting=csv.QUOTE_MINIMAL)
-        # Cabecera
-        writer.writerow(["title", "text", "label"])
-
-        for js in json_files:
-            data = json.loads(js.read_text(encoding="utf-8"))
-            title = data.get("title", "").strip()
-            # 1) Fila humana
-            content = data.get("content", "").strip()
-            if content:
-                writer.writerow([title, content, 0])
-
-            # 2) Filas IA: deepseek, llama, gemma, etc.
-            for key, val in data.items():
-                if key in SKIP_KEYS:
-                    continue
-                ia_text = (val or "").strip()
-                if ia_text:
-                    writer.writerow([title, ia_text, 1])
-
-    print(f"✔️  CSV generado: {out_csv}  ({len(json_files)} archivos procesados)")
+    manifest = load_manifest(out_csv) if incremental else None
+    Output = output_class(out_csv)
+    if manifest is None:
+        # Construcción completa
+        writer = Output(out_csv)
+        try:
+            entries, n_articles = write_files(writer, json_dir, json_files, jobs, progress_every)
+        finally:
+            writer.close()
+        if incremental:
+            save_manifest(out_csv, {"archivos": entries})
+        print(f"✔️  CSV generado: {out_csv}  ({len(json_files)} archivos, {n_articles} artículos procesados, "
+              f"{sum(e['filas'] for e in entries)} filas en {time.time() - t0:.1f} s)")
+        return
 
-def main():
-    if len(sys.argv) != 3:
-        print("Uso: python 03_json_to_csv.py <carpeta_json> <salida.csv>")
-        sys.exit(1)
+    kept, pending = diff_manifest(json_dir, json_files, manifest)
+    removed = len(manifest["archivos"]) - len(kept)
+    if not pending and not removed:
+        print(f"✔️  CSV al día: {out_csv}  (ningún archivo nuevo ni cambiado)")
+        save_manifest(out_csv, {"archivos": kept})  # por si algún mtime cambió sin cambiar el contenido
+        return
+
+    if removed or not Output.can_append:
+        # Hay filas que quitar (o es Parquet): se reescribe copiando las que siguen valiendo
+        tmp = out_csv.with_name(out_csv.name + ".tmp")
+        writer = Output(tmp)
+        try:
+            writer.copy_kept(out_csv, manifest["archivos"], {e["path"] for e in kept})
+            entries, n_articles = write_files(writer, json_dir, pending, jobs, progress_every)
+        finally:
+            writer.close()
+        os.replace(tmp, out_csv)
+    else:
+        # Solo ficheros nuevos: se añaden al final
+        writer = Output(out_csv, append=True)
+        try:
+            entries, n_articles = write_files(writer, json_dir, pending, jobs, progress_every)
+        finally:
+            writer.close()
 
-    folder = pathlib.Path(sys.argv[1])
-    out    = pathlib.Path(sys.argv[2])
+    save_manifest(out_csv, {"archivos": kept + entries})
+    print(f"✔️  CSV actualizado: {out_csv}  ({len(pending)} archivos leídos, {removed} quitados o cambiados, "
+          f"{len(kept)} sin cambios; {n_articles} artículos procesados en {time.time() - t0:.1f} s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Crea el CSV (title, text, label) a partir de los artículos")
+    parser.add_argument("carpeta_json", type=pathlib.Path)
+    parser.add_argument("salida_csv", type=pathlib.Path, help="Fichero .csv o .parquet")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Procesos lectores (por defecto, uno por núcleo)")
+    parser.add_argument("--progreso", type=int, default=1000, help="Informar cada N archivos (0 para no informar)")
+    parser.add_argument("-r", "--recursivo", action="store_true", help="Recorrer también las subcarpetas")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Leer solo lo nuevo o cambiado desde la última vez (usa <salida>.manifest.json)")
+    args = parser.parse_args()
 
-    if not folder.is_dir():
-        print(f"Error: {folder} no es un directorio válido")
+    if not args.carpeta_json.is_dir():
+        print(f"Error: {args.carpeta_json} no es un directorio válido")
         sys.exit(1)
 
-    process_folder(folder, out)
+    process_folder(args.carpeta_json, args.salida_csv, args.jobs, args.progreso,
+                   recursive=args.recursivo, incremental=args.incremental)
 
 if __name__ == "__main__":
     main()
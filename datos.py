@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Lectura y escritura de los conjuntos de datos comunes a todos los scripts.
+# Se aceptan CSV (title, text, label) y Parquet, que es lo que conviene usar con
+# corpus grandes: es columnar, va comprimido, lleva columnas extra (fuente, sitio,
+# seccion, id) y datasets lo memory-mapea sin volver a parsear el texto ni pasar por pandas.
+#
+# Los CSV se pueden leer también comprimidos, sin descomprimirlos antes en disco:
+# .zip con un único .csv/.parquet dentro (p. ej. "Data sets/testFinal.zip"),
+# .gz y .zst (este último necesita zstandard). Se descomprimen al vuelo por bloques.
+import gzip
+import io
+import os
+import zipfile
+
+# Columnas que escribe crearCSV.py en Parquet (en CSV solo las tres primeras)
+COLUMNAS = ["title", "text", "label", "fuente", "sitio", "seccion", "id"]
+
+# Extensiones de compresión que se quitan para saber el formato de dentro
+COMPRESION = (".zip", ".gz", ".zst")
+
+
+# Nombre del fichero de datos dentro del zip (tiene que haber uno solo)
+def miembro_zip(zf, path):
+    nombres = [n for n in zf.namelist()
+               if n.endswith((".csv", ".parquet")) and not n.startswith("__MACOSX/")]
+    if len(nombres) != 1:
+        raise ValueError(f"{path}: el zip debe contener un único .csv o .parquet (tiene {nombres})")
+    return nombres[0]
+
+
+# Nombre del fichero de datos sin la extensión de compresión (o el del miembro del zip)
+def nombre_datos(path) -> str:
+    path = str(path)
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as zf:
+            return miembro_zip(zf, path)
+    for ext in COMPRESION:
+        if path.endswith(ext):
+            return path[:-len(ext)]
+    return path
+
+
+def es_parquet(path) -> bool:
+    return nombre_datos(path).endswith(".parquet")
+
+
+def esta_comprimido(path) -> bool:
+    return str(path).endswith(COMPRESION)
+
+
+# Flujo binario con el contenido descomprimido (se lee por bloques, no se extrae a disco)
+def abrir_binario(path):
+    path = str(path)
+    if path.endswith(".zip"):
+        zf = zipfile.ZipFile(path)
+        return zf.open(miembro_zip(zf, path))
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        import zstandard  # solo hace falta para ficheros .zst
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True, closefd=True)
+    return open(path, "rb")
+
+
+# Origen para pyarrow/pandas: la ruta si no está comprimido; si no, el flujo descomprimido
+# (un Parquet comprimido se carga en memoria porque su lector necesita saltar por el fichero)
+def origen(path):
+    if not esta_comprimido(path):
+        return str(path)
+    f = abrir_binario(path)
+    if es_parquet(path):
+        with f:
+            return io.BytesIO(f.read())
+    return f
+
+
+# DataFrame de pandas con el contenido del fichero (CSV o Parquet)
+def leer_tabla(path, columnas=None):
+    import pandas as pd
+    if es_parquet(path):
+        return pd.read_parquet(origen(path), columns=columnas)
+    return pd.read_csv(origen(path), usecols=columnas, encoding="utf-8")
+
+
+# Guarda un DataFrame en el formato que indique la extensión de path
+def guardar_tabla(df, path):
+    if es_parquet(path):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False, encoding="utf-8")
+
+
+# Textos y etiquetas para evaluar: solo se leen esas dos columnas, por lotes
+def leer_textos(path):
+    texts, labels = [], []
+    for lote in leer_lotes(path, columnas=["text", "label"]):
+        texts.extend("" if t is None else t for t in lote.column("text").to_pylist())
+        labels.extend(lote.column("label").to_pylist())
+    return texts, labels
+
+
+# Filas de un fichero como diccionarios, para Dataset.from_generator
+def filas(path, firma=None):
+    for lote in leer_lotes(path):
+        yield from lote.to_pylist()
+
+
+# Dataset de HuggingFace: el Parquet se convierte una vez a la caché Arrow de
+# datasets y a partir de ahí se memory-mapea; el CSV sigue funcionando igual.
+# Los comprimidos se pasan a la caché por lotes sin extraerlos a disco.
+def cargar_dataset(path):
+    from datasets import Dataset
+    if esta_comprimido(path):
+        st = os.stat(path)
+        # La firma hace que la caché cambie si cambia el fichero
+        return Dataset.from_generator(filas, gen_kwargs={"path": str(path), "firma": (st.st_size, st.st_mtime_ns)})
+    if es_parquet(path):
+        return Dataset.from_parquet(str(path))
+    return Dataset.from_csv(str(path))
+
+
+# Lotes (pyarrow.RecordBatch) de un CSV o Parquet, sin cargar el fichero entero en memoria
+def leer_lotes(path, tam=65536, columnas=None):
+    if es_parquet(path):
+        import pyarrow.parquet as pq
+        yield from pq.ParquetFile(origen(path)).iter_batches(batch_size=tam, columns=columnas)
+        return
+    import pyarrow as pa
+    import pyarrow.csv as pv
+    # Tipos fijos: si no, cada bloque podría inferir uno distinto (p. ej. un título vacío)
+    tipos = {c: pa.string() for c in COLUMNAS if c != "label"}
+    tipos["label"] = pa.int8()
+    f = origen(path)
+    try:
+        yield from pv.open_csv(f,
+                               read_options=pv.ReadOptions(block_size=16 << 20),
+                               parse_options=pv.ParseOptions(newlines_in_values=True),  # textos con saltos de línea
+                               convert_options=pv.ConvertOptions(column_types=tipos, include_columns=columnas))
+    finally:
+        if not isinstance(f, str):
+            f.close()
+
+
+# Escribe lotes de pyarrow en CSV o Parquet según la extensión de path
+class EscritorLotes:
+    def __init__(self, path, schema):
+        if es_parquet(path):
+            import pyarrow.parquet as pq
+            self.writer = pq.ParquetWriter(str(path), schema, compression="zstd")
+        else:
+            import pyarrow.csv as pv
+            self.writer = pv.CSVWriter(str(path), schema, write_options=pv.WriteOptions(quoting_style="needed"))
+        self.filas = 0
+
+    def escribir(self, lote):
+        if lote.num_rows:
+            self.writer.write_batch(lote)
+            self.filas += lote.num_rows
+
+    def close(self):
+        self.writer.close()
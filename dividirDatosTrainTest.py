@@ -1,32 +1,138 @@
 #!/usr/bin/env python3
 
 # Script para dividir el conjunto de noticias en train y test
+# Acepta .csv o .parquet y escribe train/test en el mismo formato que la entrada
+#
+# La división es por grupos: una noticia real y sus versiones generadas comparten
+# id (o título) y caen siempre en el mismo conjunto, así el test no tiene
+# reescrituras de artículos que el modelo ya vio en train. El conjunto de cada
+# grupo lo decide un hash estable de la clave, de modo que se reparte fila a fila
+# en una sola pasada y sin cargar el fichero en memoria.
+#
+# Uso:
+#   python dividirDatosTrainTest.py datos.parquet             # train/test 80/20
+#   python dividirDatosTrainTest.py datos.csv --test 0.1
+#   python dividirDatosTrainTest.py datos.parquet --folds 5   # fold<i>/train y fold<i>/test
+#   python dividirDatosTrainTest.py datos.csv --por-filas     # división antigua fila a fila (en memoria)
 
-import pandas as pd
-from sklearn.model_selection import train_test_split
+import argparse
+import hashlib
+import os
 import sys
+from datos import leer_tabla, guardar_tabla, es_parquet, leer_lotes, EscritorLotes
 
-# Cargamos .csv
-csvPath = sys.argv[1]
-file = pd.read_csv(csvPath, encoding='utf-8')
-
-# Print para comprobar posibles errores
-print(f"Total filas: {len(file)}")
-
-# División
-trainFile, testFile = train_test_split(
-    file,
-    test_size=0.2,            # 20% para text
-    random_state=42,          # semilla para reproducibilidad
-    shuffle=True,             # baraja antes de dividir ya que el .csv lo he creado por bloques de noticias (de una real acto seguido van sus tres generadas)
-    stratify=file['label']    # mantiene proporción de label=0/1
-)
-
-# Guardamos
-trainFile.to_csv("train.csv", index=False, encoding='utf-8')
-testFile.to_csv("test.csv",   index=False, encoding='utf-8')
-
-# Mas prints para comprobar errores, se pueden eliminar luego
-print("No ha habido errores:")
-print(f"train.csv: {len(trainFile)} filas ({len(trainFile)/len(file)*100:.1f}%)")
-print(f"test.csv:   {len(testFile)} filas ({len(testFile)/len(file)*100:.1f}%)")
+# Resolución del reparto train/test (el test es la fracción de cubos más baja)
+CUBOS = 10000
+
+
+# Hash estable (no depende de PYTHONHASHSEED) de la clave de grupo de cada fila del lote
+def hashes_grupo(lote, semilla):
+    n = lote.num_rows
+    columnas = [lote.column(c).to_pylist() if c in lote.schema.names else [None] * n
+                for c in ("id", "title", "text")]
+    hashes = []
+    for id_, titulo, texto in zip(*columnas):
+        # id si lo hay (Parquet de crearCSV.py), si no el título; sin ninguno, cada texto es su grupo
+        clave = id_ or (titulo or "").strip() or texto or ""
+        h = hashlib.blake2b(f"{semilla}:{clave}".encode("utf-8"), digest_size=8).digest()
+        hashes.append(int.from_bytes(h, "big"))
+    return hashes
+
+
+# Divide en una pasada: salidas es {nombre: fichero} y destino(h) da el nombre de salida de cada hash
+def repartir(path, salidas, destinos, semilla):
+    import pyarrow as pa
+    escritores = {}
+    try:
+        for lote in leer_lotes(path):
+            hashes = hashes_grupo(lote, semilla)
+            for nombre, elegir in destinos.items():
+                mascara = pa.array([elegir(h) for h in hashes], type=pa.bool_())
+                if nombre not in escritores:
+                    escritores[nombre] = EscritorLotes(salidas[nombre], lote.schema)
+                escritores[nombre].escribir(lote.filter(mascara))
+    finally:
+        for escritor in escritores.values():
+            escritor.close()
+    return {nombre: e.filas for nombre, e in escritores.items()}
+
+
+def dividir_train_test(path, test, semilla, salida, ext):
+    corte = int(test * CUBOS)
+    salidas = {"train": os.path.join(salida, "train" + ext), "test": os.path.join(salida, "test" + ext)}
+    filas = repartir(path, salidas, {
+        "train": lambda h: h % CUBOS >= corte,
+        "test": lambda h: h % CUBOS < corte,
+    }, semilla)
+    total = sum(filas.values())
+    print(f"Total filas: {total}")
+    for nombre in ("train", "test"):
+        print(f"{salidas[nombre]}: {filas.get(nombre, 0)} filas ({filas.get(nombre, 0) / max(total, 1) * 100:.1f}%)")
+
+
+def dividir_k_fold(path, k, semilla, salida, ext):
+    salidas, destinos = {}, {}
+    for i in range(k):
+        os.makedirs(os.path.join(salida, f"fold{i}"), exist_ok=True)
+        salidas[f"fold{i}/train"] = os.path.join(salida, f"fold{i}", "train" + ext)
+        salidas[f"fold{i}/test"] = os.path.join(salida, f"fold{i}", "test" + ext)
+        destinos[f"fold{i}/train"] = lambda h, i=i: h % k != i
+        destinos[f"fold{i}/test"] = lambda h, i=i: h % k == i
+    filas = repartir(path, salidas, destinos, semilla)
+    for i in range(k):
+        print(f"fold{i}: train {filas.get(f'fold{i}/train', 0)} filas, test {filas.get(f'fold{i}/test', 0)} filas")
+
+
+# División antigua fila a fila, estratificada por label (carga todo en pandas)
+def dividir_por_filas(path, test, semilla, salida, ext):
+    from sklearn.model_selection import train_test_split
+    file = leer_tabla(path)
+
+    # Print para comprobar posibles errores
+    print(f"Total filas: {len(file)}")
+
+    # División
+    trainFile, testFile = train_test_split(
+        file,
+        test_size=test,           # 20% para text
+        random_state=semilla,     # semilla para reproducibilidad
+        shuffle=True,             # baraja antes de dividir ya que el .csv lo he creado por bloques de noticias (de una real acto seguido van sus tres generadas)
+        stratify=file['label']    # mantiene proporción de label=0/1
+    )
+
+    # Guardamos
+    guardar_tabla(trainFile, os.path.join(salida, "train" + ext))
+    guardar_tabla(testFile,  os.path.join(salida, "test" + ext))
+
+    print(f"train{ext}: {len(trainFile)} filas ({len(trainFile)/len(file)*100:.1f}%)")
+    print(f"test{ext}:   {len(testFile)} filas ({len(testFile)/len(file)*100:.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Divide el conjunto de noticias en train y test")
+    parser.add_argument("datos", help="Fichero .csv o .parquet")
+    parser.add_argument("--test", type=float, default=0.2, help="Fracción para test (por defecto 0.2)")
+    parser.add_argument("--folds", type=int, default=0, help="Escribir K particiones fold<i>/train y fold<i>/test")
+    parser.add_argument("--semilla", type=int, default=42, help="Semilla para reproducibilidad")
+    parser.add_argument("--salida", default=".", help="Carpeta de salida")
+    parser.add_argument("--por-filas", action="store_true", help="División antigua fila a fila, sin agrupar")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.datos):
+        sys.exit(f"Error: no existe {args.datos}")
+    os.makedirs(args.salida, exist_ok=True)
+    ext = ".parquet" if es_parquet(args.datos) else ".csv"
+
+    if args.por_filas:
+        dividir_por_filas(args.datos, args.test, args.semilla, args.salida, ext)
+    elif args.folds > 1:
+        dividir_k_fold(args.datos, args.folds, args.semilla, args.salida, ext)
+    else:
+        dividir_train_test(args.datos, args.test, args.semilla, args.salida, ext)
+
+    # Mas prints para comprobar errores, se pueden eliminar luego
+    print("No ha habido errores")
+
+
+if __name__ == "__main__":
+    main()
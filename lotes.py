@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Lotes agrupados por longitud para entrenar y evaluar los modelos de HuggingFace.
+# Los párrafos de noticias tienen longitudes muy distintas y el collator rellena
+# cada lote hasta el más largo, así que con lotes al azar (o en el orden del CSV)
+# buena parte del cómputo se va en tokens de padding. Aquí:
+#   SamplerLongitudBalanceado  sortea los ejemplos igual que WeightedRandomSampler
+#                              (clases 50/50) y luego los agrupa por longitud
+#   SamplerPorLongitud         recorre un conjunto de más largo a más corto (evaluación)
+#   SamplerPresupuestoBalanceado / lotes_por_tokens
+#                              lotes de tamaño variable con un máximo de tokens
+#                              (con padding) en vez de un nº fijo de ejemplos
+#   eficiencia_padding         fracción de tokens reales sobre los que se calculan
+import numpy as np
+import torch
+from torch.utils.data import Sampler
+
+# Lotes que se ordenan juntos: más grande agrupa mejor, más pequeño mezcla más
+LOTES_POR_GRUPO = 50
+# Lo mismo con lotes por presupuesto de tokens, en ejemplos
+EJEMPLOS_POR_GRUPO = 2000
+
+
+# Longitud en tokens de cada ejemplo de un Dataset tokenizado (sin pasar por Python fila a fila)
+def longitudes(ds):
+    import pyarrow.compute as pc
+    return pc.list_value_length(ds.with_format("arrow")["input_ids"]).to_numpy()
+
+
+def lotes_de(indices, batch_size):
+    return [indices[i:i + batch_size] for i in range(0, len(indices), batch_size)]
+
+
+# Tokens reales / tokens calculados, si cada lote se rellena hasta su ejemplo más largo
+def eficiencia_padding(longitudes, lotes):
+    reales = calculados = 0
+    for lote in lotes:
+        largos = longitudes[lote]
+        reales += int(largos.sum())
+        calculados += int(largos.max()) * len(largos)
+    return reales / max(calculados, 1)
+
+
+# El mismo sorteo que WeightedRandomSampler (con reemplazo, según los pesos),
+# así que la proporción de clases de cada época no cambia
+def sortear(sample_weights, generator=None):
+    return torch.multinomial(sample_weights, len(sample_weights), replacement=True, generator=generator).numpy()
+
+
+# Índices de una época: el sorteo de arriba o, si se pasa, otro (p. ej. ponderacion.SorteoEstratificado)
+def indices_epoca(sample_weights, generator=None, sorteo=None):
+    return sorteo() if sorteo else sortear(sample_weights, generator)
+
+
+# Grupos consecutivos de tam_grupo índices, cada uno ordenado de más largo a más corto
+def ordenar_por_grupos(indices, longitudes, tam_grupo):
+    grupos = (indices[i:i + tam_grupo] for i in range(0, len(indices), tam_grupo))
+    return [g[np.argsort(-longitudes[g], kind="stable")] for g in grupos]
+
+
+# Corta índices (ya ordenados por longitud) en lotes de como mucho max_tokens contando
+# el padding (nº de ejemplos × el más largo) y, si se indica, max_ejemplos ejemplos
+def lotes_por_tokens(indices, longitudes, max_tokens, max_ejemplos=None):
+    lotes, actual, mas_largo = [], [], 0
+    for i, largo in zip(indices.tolist(), longitudes[indices].tolist()):
+        nuevo_largo = max(mas_largo, largo)
+        if actual and (nuevo_largo * (len(actual) + 1) > max_tokens or len(actual) == max_ejemplos):
+            lotes.append(np.array(actual))
+            actual, nuevo_largo = [], largo
+        actual.append(i)
+        mas_largo = nuevo_largo
+    if actual:
+        lotes.append(np.array(actual))
+    return lotes
+
+
+class SamplerLongitudBalanceado(Sampler):
+    def __init__(self, longitudes, sample_weights, batch_size, lotes_por_grupo=LOTES_POR_GRUPO, generator=None, sorteo=None):
+        self.longitudes = np.asarray(longitudes)
+        self.sample_weights = torch.as_tensor(sample_weights, dtype=torch.double)
+        self.batch_size = batch_size
+        self.tam_grupo = batch_size * lotes_por_grupo
+        self.generator = generator
+        self.sorteo = sorteo
+        self.siguiente = None
+        self.sorteada = False
+
+    def __len__(self):
+        return len(self.sorteo) if self.sorteo else len(self.longitudes)
+
+    # Lotes de una época
+    def lotes(self):
+        lotes = []
+        indices = indices_epoca(self.sample_weights, self.generator, self.sorteo)
+        for grupo in ordenar_por_grupos(indices, self.longitudes, self.tam_grupo):
+            lotes.extend(lotes_de(grupo, self.batch_size))
+        if not lotes:
+            return []
+        # Se barajan los lotes, pero el último (quizá incompleto) se queda al final
+        # para que el DataLoader los corte por los mismos sitios
+        completos = len(lotes) if len(lotes[-1]) == self.batch_size else len(lotes) - 1
+        orden = torch.randperm(completos, generator=self.generator).tolist()
+        return [lotes[i] for i in orden] + lotes[completos:]
+
+    # Como en SamplerPresupuestoBalanceado: si se piden los lotes antes de entrenar
+    # (para el informe de padding) esa época se guarda y es la primera que se recorre,
+    # así no se gasta un sorteo (que con un sorteo estratificado avanza sus permutaciones)
+    def primera_epoca(self):
+        if not self.sorteada:
+            self.siguiente = self.lotes()
+            self.sorteada = True
+        return self.siguiente
+
+    def __iter__(self):
+        lotes = self.siguiente if self.siguiente is not None else self.lotes()
+        self.siguiente = None
+        for lote in lotes:
+            yield from lote.tolist()
+
+
+# batch_sampler para el DataLoader: da lotes enteros, de tamaño variable, con el
+# sorteo balanceado de siempre y como mucho max_tokens (con padding) cada uno.
+# Como el sorteo cambia en cada época, el nº de lotes también un poco; __len__
+# (que el Trainer usa para contar pasos) es el de la primera época.
+class SamplerPresupuestoBalanceado(Sampler):
+    def __init__(self, longitudes, sample_weights, max_tokens, max_ejemplos=None,
+                 tam_grupo=EJEMPLOS_POR_GRUPO, generator=None, sorteo=None):
+        self.longitudes = np.asarray(longitudes)
+        self.sample_weights = torch.as_tensor(sample_weights, dtype=torch.double)
+        self.max_tokens = max_tokens
+        self.max_ejemplos = max_ejemplos
+        self.tam_grupo = tam_grupo
+        self.generator = generator
+        self.sorteo = sorteo
+        self.siguiente = None
+        self.n_lotes = None
+
+    def lotes(self):
+        lotes = []
+        indices = indices_epoca(self.sample_weights, self.generator, self.sorteo)
+        for grupo in ordenar_por_grupos(indices, self.longitudes, self.tam_grupo):
+            lotes.extend(lotes_por_tokens(grupo, self.longitudes, self.max_tokens, self.max_ejemplos))
+        orden = torch.randperm(len(lotes), generator=self.generator).tolist()
+        return [lotes[i] for i in orden]
+
+    # La primera época se sortea en cuanto hace falta su tamaño (o sus lotes, para
+    # calcular medias antes de entrenar) y se guarda para recorrerla tal cual
+    def primera_epoca(self):
+        if self.n_lotes is None:
+            self.siguiente = self.lotes()
+            self.n_lotes = len(self.siguiente)
+        return self.siguiente
+
+    def __len__(self):
+        self.primera_epoca()
+        return self.n_lotes
+
+    def __iter__(self):
+        lotes = self.siguiente if self.siguiente is not None else self.lotes()
+        self.siguiente = None
+        for lote in lotes:
+            yield lote.tolist()
+
+
+class SamplerPorLongitud(Sampler):
+    def __init__(self, longitudes):
+        self.longitudes = np.asarray(longitudes)
+
+    def __len__(self):
+        return len(self.longitudes)
+
+    # Primero los más largos: si no caben en memoria se ve en el primer lote
+    def orden(self):
+        return np.argsort(-self.longitudes, kind="stable")
+
+    def __iter__(self):
+        return iter(self.orden().tolist())
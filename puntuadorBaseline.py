@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Formato compacto del baseline (CountVectorizer + LogisticRegression) y un
+# puntuador que lo usa sin sklearn.
+#
+# baseline.py guarda con joblib el vectorizador entero (con el vocabulario en un
+# dict de Python y el set stop_words_ con todos los términos descartados) y el
+# clasificador, y cargarlo tarda y ocupa bastante. Para predecir solo hace falta:
+#   vocabulario.npy  términos ordenados alfabéticamente (array de numpy, se abre con memory-map)
+#   coef.npy         peso de cada término, en el mismo orden
+#   config.json      intercept, clases y parámetros de tokenización
+# La puntuación de un texto es la suma de los pesos de sus tokens más el
+# intercept, que es lo mismo que decision_function de LogisticRegression sobre la
+# matriz de conteos.
+#
+# Abrir el modelo tarda milisegundos, pero la primera puntuación (en cada proceso
+# del pool también) pasa el vocabulario a un dict de Python para buscar los términos:
+# unos 12 ms y unos MB por cada 50000 términos, a cambio de no cargar sklearn.
+#
+# Los textos se puntúan por lotes: se tokenizan todos los del lote, se busca la
+# columna de cada término y con eso ya está la matriz CSR (columnas e indptr por
+# texto), así que X @ coef + intercept es un bincount. Con -j los lotes se
+# reparten entre procesos, que abren el modelo con memory-map.
+#
+# Uso:
+#   python puntuadorBaseline.py --exportar                  # convierte los .joblib de baseline.py
+#   python puntuadorBaseline.py test.csv -j 8               # predice con el modelo compacto
+#   python puntuadorBaseline.py test.csv --benchmark -j 8   # docs/s frente a joblib + sklearn
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+MODELO_DIR = "modeloBaseline"
+FORMATO = 1
+
+# Textos que se tokenizan y puntúan juntos (y que recibe cada proceso por tarea)
+TEXTOS_POR_LOTE = 2000
+
+
+# Guarda vectorizador y clasificador ya entrenados en el formato compacto
+def exportar(vectorizer, classifier, directorio=MODELO_DIR):
+    if not hasattr(vectorizer, "vocabulary_"):
+        raise ValueError("solo se puede exportar el modo bow (CountVectorizer con vocabulario)")
+    if vectorizer.analyzer != "word" or vectorizer.tokenizer or vectorizer.preprocessor or vectorizer.strip_accents:
+        raise ValueError("el vectorizador usa un analizador personalizado que el puntuador no reproduce")
+    if len(classifier.classes_) != 2:
+        raise ValueError("el puntuador solo admite clasificadores binarios")
+
+    terminos = sorted(vectorizer.vocabulary_)
+    columnas = np.fromiter((vectorizer.vocabulary_[t] for t in terminos), dtype=np.int64, count=len(terminos))
+    stop_words = vectorizer.get_stop_words()
+    config = {
+        "formato": FORMATO,
+        "clases": [int(c) for c in classifier.classes_],
+        "intercept": float(classifier.intercept_[0]),
+        "lowercase": bool(vectorizer.lowercase),
+        "token_pattern": vectorizer.token_pattern,
+        "ngram_range": list(vectorizer.ngram_range),
+        "stop_words": sorted(stop_words) if stop_words else None,
+        "binary": bool(vectorizer.binary),
+    }
+
+    os.makedirs(directorio, exist_ok=True)
+    np.save(os.path.join(directorio, "vocabulario.npy"), np.array(terminos, dtype=str))
+    np.save(os.path.join(directorio, "coef.npy"), np.asarray(classifier.coef_[0], dtype=np.float64)[columnas])
+    with open(os.path.join(directorio, "config.json"), "w", encoding="utf-8") as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+class PuntuadorBaseline:
+    def __init__(self, directorio=MODELO_DIR, jobs=1, lote=TEXTOS_POR_LOTE):
+        self.directorio = directorio
+        self.jobs = jobs
+        self.lote = lote
+        with open(os.path.join(directorio, "config.json"), encoding="utf-8") as f:
+            self.config = json.load(f)
+        if self.config["formato"] != FORMATO:
+            raise ValueError(f"{directorio}: formato {self.config['formato']} no soportado")
+        self.vocabulario = np.load(os.path.join(directorio, "vocabulario.npy"), mmap_mode="r")
+        self.coef = np.load(os.path.join(directorio, "coef.npy"), mmap_mode="r")
+        self.intercept = self.config["intercept"]
+        self.clases = self.config["clases"]
+        self.patron = re.compile(self.config["token_pattern"])
+        self.stop_words = frozenset(self.config["stop_words"] or ())
+        self.ngramas = tuple(self.config["ngram_range"])
+        self.columnas = None
+
+    # Los mismos términos que saca build_analyzer() de CountVectorizer
+    def terminos(self, texto):
+        if self.config["lowercase"]:
+            texto = texto.lower()
+        tokens = self.patron.findall(texto)
+        if self.stop_words:
+            tokens = [t for t in tokens if t not in self.stop_words]
+        minimo, maximo = self.ngramas
+        if maximo == 1:
+            return tokens
+        terminos = list(tokens) if minimo == 1 else []
+        for n in range(max(minimo, 2), min(maximo, len(tokens)) + 1):
+            terminos.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return terminos
+
+    # Columna de cada término en el vocabulario (-1 si no está). El dict se construye
+    # al puntuar por primera vez: pasar los términos a un array de numpy y buscarlos
+    # con np.searchsorted sobre el vocabulario ordenado era tres veces más lento
+    def indices(self, terminos):
+        if self.columnas is None:
+            self.columnas = dict(zip(self.vocabulario.tolist(), range(len(self.vocabulario))))
+        get = self.columnas.get
+        return np.fromiter((get(t, -1) for t in terminos), dtype=np.int64, count=len(terminos))
+
+    # decision_function de un lote: suma de pesos de los términos de cada texto + intercept
+    def puntuar_lote(self, texts):
+        terminos, indptr = [], [0]
+        for texto in texts:
+            terminos.extend(self.terminos(texto or ""))
+            indptr.append(len(terminos))
+        # (fila, columna) de cada aparición: la matriz CSR de conteos sin sumar repetidos
+        columnas = self.indices(terminos)
+        filas = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        validos = columnas >= 0
+        filas, columnas = filas[validos], columnas[validos]
+        if self.config["binary"]:
+            unicos = np.unique(filas * len(self.vocabulario) + columnas)
+            filas, columnas = unicos // len(self.vocabulario), unicos % len(self.vocabulario)
+        return np.bincount(filas, weights=self.coef[columnas], minlength=len(texts)) + self.intercept
+
+    def puntuar(self, texts):
+        lotes = [texts[i:i + self.lote] for i in range(0, len(texts), self.lote)]
+        if not lotes:
+            return np.empty(0, dtype=np.float64)
+        if self.jobs <= 1 or len(lotes) == 1:
+            return np.concatenate([self.puntuar_lote(lote) for lote in lotes])
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs, initializer=_iniciar,
+                                                    initargs=(self.directorio,)) as pool:
+            return np.concatenate(list(pool.map(_puntuar_lote, lotes)))
+
+    # Como predict_proba: columna i = probabilidad de self.clases[i]
+    def probabilidades(self, texts):
+        # sigmoide escrita con tanh para que no desborde con puntuaciones grandes
+        p = 0.5 * (1.0 + np.tanh(0.5 * self.puntuar(texts)))
+        return np.column_stack((1.0 - p, p))
+
+    def predecir(self, texts):
+        return np.where(self.puntuar(texts) > 0, self.clases[1], self.clases[0]).tolist()
+
+
+# Puntuador de cada proceso del pool (se carga una vez por proceso)
+_puntuador = None
+
+
+def _iniciar(directorio):
+    global _puntuador
+    _puntuador = PuntuadorBaseline(directorio)
+
+
+def _puntuar_lote(texts):
+    return _puntuador.puntuar_lote(texts)
+
+
+# Docs/s del camino de clasificationReport.py (joblib + transform + predict) frente al puntuador
+def benchmark(texts, directorio, jobs):
+    import joblib
+    from baseline import VECT_PATH, CLF_PATH
+
+    inicio = time.perf_counter()
+    vec, clf = joblib.load(VECT_PATH), joblib.load(CLF_PATH)
+    referencia = clf.predict(vec.transform(texts)).tolist()
+    tiempos = {"joblib + sklearn": time.perf_counter() - inicio}
+
+    for j in sorted({1, jobs}):
+        inicio = time.perf_counter()
+        yPred = PuntuadorBaseline(directorio, jobs=j).predecir(texts)
+        tiempos[f"puntuador -j {j}"] = time.perf_counter() - inicio
+        if yPred != referencia:
+            print(f"Aviso: puntuador -j {j} no da las mismas predicciones que sklearn", file=sys.stderr)
+
+    base = tiempos["joblib + sklearn"]
+    for nombre, dt in tiempos.items():
+        print(f"{nombre:18} {dt:7.2f} s  {len(texts) / dt:10.0f} docs/s  x{base / dt:.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Modelo compacto del baseline")
+    parser.add_argument("datos", nargs="?", help="CSV o Parquet con columnas 'text' y 'label' para evaluar")
+    parser.add_argument("--modelo", default=MODELO_DIR, help="carpeta del modelo compacto")
+    parser.add_argument("--exportar", action="store_true", help="convertir los .joblib que guarda baseline.py")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="procesos que tokenizan y puntúan")
+    parser.add_argument("--benchmark", action="store_true", help="comparar con joblib + sklearn")
+    args = parser.parse_args()
+
+    if args.exportar:
+        import joblib
+        from baseline import VECT_PATH, CLF_PATH
+        try:
+            exportar(joblib.load(VECT_PATH), joblib.load(CLF_PATH), args.modelo)
+        except ValueError as e:
+            sys.exit(f"Error: {e}")
+        print(f"Modelo exportado a {args.modelo}")
+    if not args.datos:
+        return
+
+    from datos import leer_textos
+    texts, yTrue = leer_textos(args.datos)
+    if args.benchmark:
+        benchmark(texts, args.modelo, args.jobs)
+        return
+
+    inicio = time.perf_counter()
+    puntuador = PuntuadorBaseline(args.modelo, jobs=args.jobs)
+    print(f"Modelo cargado en {(time.perf_counter() - inicio) * 1000:.1f} ms "
+          f"({len(puntuador.vocabulario)} términos)")
+
+    inicio = time.perf_counter()
+    yPred = puntuador.predecir(texts)
+    dt = time.perf_counter() - inicio
+    acierto = sum(int(p == y) for p, y in zip(yPred, yTrue)) / max(len(yTrue), 1)
+    print(f"{len(texts)} textos en {dt:.2f} s, accuracy: {acierto:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+# Caché persistente de los datasets tokenizados para los modelos de HuggingFace.
+# Antes cada entrenamiento (y clasificationReport.py) volvía a tokenizar todo el
+# conjunto con una lambda, que además impide que datasets reutilice su propia
+# caché. Aquí el resultado (input_ids, attention_mask... y label) se guarda con
+# save_to_disk en cacheTokenizacion/<clave>, donde la clave es el hash del
+# tokenizador (su vocabulario y configuración), max_length y el contenido del
+# fichero de datos. Si ya existe se abre con load_from_disk, que memory-mapea
+# los ficheros Arrow sin leerlos; si no, se tokeniza en varios procesos (num_proc).
+import json
+import os
+import shutil
+
+from caracteristicas import huella, huella_fichero
+from datos import cargar_dataset
+
+CACHE_DIR = "cacheTokenizacion"
+
+# Procesos por defecto al tokenizar (y por debajo de estas filas no compensa lanzarlos)
+MAX_PROCESOS = 8
+FILAS_MINIMAS_PARALELO = 10000
+
+
+# Hash de todo lo que cambia la tokenización: en los tokenizadores rápidos, la
+# serialización completa (normalizador, vocabulario, merges...); en los lentos,
+# el vocabulario y los parámetros con los que se crearon.
+# truncation y padding se quitan: son el estado que deja la última llamada con
+# truncation=True (y que se guarda con los checkpoints), no parte del tokenizador
+def huella_tokenizer(tokenizer):
+    backend = getattr(tokenizer, "backend_tokenizer", None)
+    if backend is not None:
+        contenido = json.loads(backend.to_str())
+        contenido.pop("truncation", None)
+        contenido.pop("padding", None)
+    else:
+        parametros = {k: v for k, v in tokenizer.init_kwargs.items() if k not in ("name_or_path", "vocab_file")}
+        contenido = (sorted(tokenizer.get_vocab().items()), parametros)
+    return huella(type(tokenizer).__name__, contenido)
+
+
+# Dataset.map le pasa a tokenizar_lote un diccionario examples que contiene listas de cada columna
+def tokenizar_lote(examples, tokenizer, max_length):
+    return tokenizer(examples["text"], truncation=True, max_length=max_length)
+
+
+# Dataset tokenizado del fichero path (memory-mapeado desde la caché si ya se hizo).
+# cargar(path) da el Dataset original y solo se llama si no está en caché.
+def tokenizar_con_cache(path, tokenizer, max_length, cargar=cargar_dataset, cache_dir=CACHE_DIR, num_proc=None):
+    from datasets import Value, load_from_disk
+
+    clave = huella(huella_tokenizer(tokenizer), max_length, huella_fichero(path))
+    destino = os.path.join(cache_dir, clave)
+    if os.path.exists(destino):
+        return load_from_disk(destino)
+
+    ds = cargar(path)
+    if num_proc is None:
+        num_proc = min(os.cpu_count() or 1, MAX_PROCESOS)
+    if len(ds) < FILAS_MINIMAS_PARALELO or num_proc <= 1:
+        num_proc = None
+    # Solo se guardan las columnas del tokenizador y la etiqueta (como int)
+    ds = ds.map(tokenizar_lote, batched=True, num_proc=num_proc,
+                fn_kwargs={"tokenizer": tokenizer, "max_length": max_length},
+                remove_columns=[c for c in ds.column_names if c != "label"],
+                desc=f"Tokenizando {os.path.basename(str(path))}")
+    if "label" in ds.column_names:
+        ds = ds.cast_column("label", Value("int64"))
+
+    # Primero a un temporal: si se corta a medias no queda una caché rota con el nombre bueno
+    tmp = destino + ".tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    ds.save_to_disk(tmp)
+    os.replace(tmp, destino)
+    return load_from_disk(destino)